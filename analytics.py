@@ -0,0 +1,98 @@
+"""
+Зведені (аналітичні) таблиці для книги Excel:
+    - суми доходу, податку, прибутку в розрізі особа x рік, ознака доходу x рік, агент x рік
+    - проміжні підсумки щодо кожної особи / ознаки / агента та загальний підсумок
+    - всі таблиці розраховуються з одного групування записів (особа, рік, ознака, агент)
+    - періоди роботи (безперервних надходжень) щодо кожної пари особа - агент
+"""
+
+from typing import Dict, List
+
+import pandas as pd
+
+from code_labels import labels_long
+from periods import quarter_ordinal, work_periods
+
+measures = ['g8', 'g9', 'profit']
+total_label = 'Всього'
+
+
+def base_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Суми показників у розрізі особа - рік - ознака доходу - агент (одне групування всіх записів)"""
+    cube = df.groupby(['g3s', 'g12', 'g10', 'g6s'], dropna=False)[measures].sum()
+    cube.reset_index(inplace=True)
+    return cube
+
+
+def with_subtotals(cube: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Групування куба за keys x рік з рядком проміжного підсумку після кожної групи keys
+    та рядком загального підсумку в кінці таблиці
+    """
+    detail = cube.groupby(keys + ['g12'], dropna=False)[measures].sum()
+    detail.reset_index(inplace=True)
+    detail['g12'] = detail['g12'].astype(object)
+    detail['row_order'] = 0
+
+    subtotals = cube.groupby(keys, dropna=False)[measures].sum()
+    subtotals.reset_index(inplace=True)
+    subtotals['g12'] = total_label
+    subtotals['row_order'] = 1
+
+    table = pd.concat([detail, subtotals], ignore_index=True)
+    table.sort_values(keys + ['row_order'], kind='stable', inplace=True)
+
+    grand_total = {col: '' for col in keys}
+    grand_total[keys[0]] = total_label
+    grand_total['g12'] = ''
+    grand_total.update(cube[measures].sum().to_dict())
+    table = pd.concat([table, pd.DataFrame([grand_total])], ignore_index=True)
+    table.drop(columns=['row_order'], inplace=True)
+    table[measures] = table[measures].round(2)
+    return table
+
+
+def pivot_sheets(df: pd.DataFrame, headers: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """
+    Зведені таблиці для аналітичної книги Excel
+
+    :param df: датафрейм записів (FileProfitXML.df)
+    :param headers: назви колонок для відображення (FileProfitXML.headers)
+    :return: {назва аркуша: таблиця}
+    """
+    cube = base_cube(df)
+    sheets = {}
+
+    by_person = with_subtotals(cube, ['g3s'])
+    sheets['Особи за роками'] = by_person[['g3s', 'g12'] + measures]
+
+    by_code = with_subtotals(cube, ['g10'])
+    by_code.insert(1, 'label', labels_long.map(by_code['g10'].to_numpy()))
+    by_code.loc[by_code['g10'] == total_label, 'label'] = ''
+    sheets['Види доходу за роками'] = by_code[['g10', 'label', 'g12'] + measures]
+
+    by_agent = with_subtotals(cube, ['g6s'])
+    agent_names = df.drop_duplicates(subset=['g6s']).set_index('g6s')['g7s']
+    by_agent.insert(1, 'g7s', by_agent['g6s'].map(agent_names).fillna(''))
+    sheets['Агенти за роками'] = by_agent[['g6s', 'g7s', 'g12'] + measures]
+
+    for name, table in sheets.items():
+        table = table.rename(columns=headers)
+        sheets[name] = table.rename(columns={'label': 'Назва ознаки'})
+    return sheets
+
+
+def periods_sheet(df: pd.DataFrame, headers: Dict[str, str]) -> pd.DataFrame:
+    """
+    Таблиця періодів роботи: особа, код та назва агента, періоди безперервних надходжень ('1.2020 - 4.2020, 2.2021')
+
+    :param df: датафрейм записів (FileProfitXML.df)
+    :param headers: назви колонок для відображення (FileProfitXML.headers)
+    """
+    if 'qord' not in df.columns:
+        df = df.assign(qord=quarter_ordinal(df['g12'], df['g11']))
+    table = work_periods(df, ['g3s', 'g6s']).reset_index()
+    agent_names = df.drop_duplicates(subset=['g6s']).set_index('g6s')['g7s']
+    table.insert(2, 'g7s', table['g6s'].map(agent_names).fillna(''))
+    table = table.rename(columns=headers)
+    return table.rename(columns={'periods': 'Періоди роботи'})
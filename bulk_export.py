@@ -0,0 +1,110 @@
+"""
+Експорт очищених записів для подальшої аналітики (CSV, Parquet):
+    - колонки з назвами, що використовуються у коді (defines.service_col_names), та визначеними типами
+    - запис порціями (chunk) без формування повної копії таблиці
+    - опціональне розділення на частини за особою або роком (каталоги "колонка=значення", колонка розділення
+      у файлах частин не дублюється)
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import pandas as pd
+
+from defines import service_col_names
+
+# Типи колонок експорту (назви колонок - після перейменування service_col_names):
+export_dtypes = {'person_order': 'string',
+                 'person': 'string',
+                 'result_bd': 'Int16',
+                 'person_type': 'Int16',
+                 'employer_id': 'string',
+                 'employer_name': 'string',
+                 'income': 'float64',
+                 'tax': 'float64',
+                 'profit': 'float64',
+                 'desc': 'Int32',
+                 'quad': 'Int8',
+                 'year': 'Int16'}
+
+# Допустимі колонки розділення на частини: {параметр: колонка вихідного датафрейму}
+partition_columns = {'person': 'g3s', 'year': 'g12'}
+
+
+def typed_chunk(df: pd.DataFrame, partition_by: Optional[str] = None) -> pd.DataFrame:
+    """Перейменування колонок та приведення до типів експорту (порція записів вихідного датафрейму)"""
+    typed = {}
+    for col, name in service_col_names.items():
+        if col not in df.columns or name == partition_by:
+            continue
+        dtype = export_dtypes[name]
+        if dtype == 'string':
+            typed[name] = df[col].astype('string')
+        else:
+            typed[name] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return pd.DataFrame(typed, index=df.index)
+
+
+def _iter_parts(df: pd.DataFrame, file: Path, partition_by: Optional[str],
+                chunk_size: int) -> Iterator[Tuple[Path, bool, pd.DataFrame]]:
+    """
+    Ітерування порцій записів з визначенням файлу кожної порції
+
+    :return: (файл, перша порція файлу, типізована порція)
+    """
+    assert chunk_size > 0, "Розмір порції має бути більше 0"
+    if partition_by is None:
+        parts = [(file, df)]
+    else:
+        assert partition_by in partition_columns, f"Розділення можливе за: {', '.join(partition_columns.keys())}"
+        base_dir = file.with_suffix('')
+        parts = [(base_dir / f'{partition_by}={key}' / f'part-0{file.suffix}', part)
+                 for key, part in df.groupby(partition_columns[partition_by], sort=True)]
+    for part_file, part in parts:
+        part_file.parent.mkdir(parents=True, exist_ok=True)
+        for start in range(0, max(part.shape[0], 1), chunk_size):
+            yield part_file, start == 0, typed_chunk(part.iloc[start:start + chunk_size], partition_by)
+
+
+def write_csv(df: pd.DataFrame, file: Union[str, Path], partition_by: Optional[str] = None,
+              chunk_size: int = 200000):
+    """
+    Запис записів у CSV (UTF-8, роздільник - кома) порціями
+
+    :param df: очищений датафрейм (FileProfitXML.df)
+    :param file: файл CSV (при розділенні - назва каталогу частин без розширення)
+    :param partition_by: розділення на частини: None, 'person' або 'year'
+    :param chunk_size: кількість рядків у порції
+    """
+    for part_file, first, chunk in _iter_parts(df, Path(file), partition_by, chunk_size):
+        chunk.to_csv(part_file, mode='w' if first else 'a', header=first, index=False, encoding='utf-8')
+
+
+def write_parquet(df: pd.DataFrame, file: Union[str, Path], partition_by: Optional[str] = None,
+                  chunk_size: int = 200000):
+    """
+    Запис записів у Parquet порціями (кожна порція - окрема група рядків файлу). Потребує пакету pyarrow.
+
+    :param df: очищений датафрейм (FileProfitXML.df)
+    :param file: файл Parquet (при розділенні - назва каталогу частин без розширення)
+    :param partition_by: розділення на частини: None, 'person' або 'year'
+    :param chunk_size: кількість рядків у порції (групі рядків)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Для запису Parquet необхідний пакет pyarrow (pip install pyarrow)')
+
+    schema = pa.Schema.from_pandas(typed_chunk(df.iloc[:0], partition_by), preserve_index=False)
+    writer = None
+    try:
+        for part_file, first, chunk in _iter_parts(df, Path(file), partition_by, chunk_size):
+            if first:
+                if writer is not None:
+                    writer.close()
+                writer = pq.ParquetWriter(part_file, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
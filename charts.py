@@ -0,0 +1,339 @@
+"""
+Формування графіків для звітів MS Word (PNG):
+    - об'єктний інтерфейс matplotlib (Figure + FigureCanvasAgg) без pyplot та глобального стану
+    - фігури кожного типу графіка створюються один раз та використовуються повторно (оновлюються лише дані)
+    - стиль застосовується лише на час формування графіка (не змінює глобальні налаштування matplotlib)
+    - фігури звільняються явно (close), обсяг пам'яті не залежить від кількості осіб у звіті
+    - сформовані PNG кешуються за хешем вхідних даних та параметрів графіка (ChartCache): повторний експорт
+      тих самих даних не потребує формування графіків; кеш зберігається у пам'яті процесу, витіснення на диск -
+      лише у явно заданий каталог з обмеженням кількості файлів (графіки містять персональні дані)
+    - графіки можуть формуватись заздалегідь у пулі процесів (prerender): під час формування документа PNG
+      отримується з результату відповідного завдання пулу
+"""
+
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import matplotlib
+from matplotlib import cm, rcParams, style
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Стиль графіків (назва залежить від версії matplotlib), перший доступний:
+CHART_STYLES = ('seaborn-v0_8-whitegrid', 'seaborn-whitegrid')
+
+_subplot_params = ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')
+
+
+def _available_style() -> str:
+    for name in CHART_STYLES:
+        if name in style.available:
+            return name
+    return 'default'
+
+
+class ChartCache:
+    """
+    Кеш сформованих графіків (PNG) за хешем вхідних даних: у пам'яті - max_items останніх використаних графіків.
+    Якщо задано каталог spill_dir - графіки, витіснені з пам'яті (LRU), зберігаються у ньому (не більше max_spilled
+    файлів, найдавніше використані видаляються) та завантажуються з нього при потребі, інакше - відкидаються.
+    """
+
+    def __init__(self, max_items=256, spill_dir: Optional[Union[str, Path]] = None, max_spilled=1024):
+        """
+        :param max_items: кількість графіків у пам'яті
+        :param spill_dir: каталог витіснених графіків (None - лише пам'ять)
+        :param max_spilled: найбільша кількість графіків у каталозі spill_dir
+        """
+        assert max_items > 0, "Кількість графіків у пам'яті має бути більше 0"
+        assert max_spilled > 0, "Кількість графіків у каталозі має бути більше 0"
+        self.max_items = max_items
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.max_spilled = max_spilled
+        self._items: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, *params) -> str:
+        """Ключ графіка: хеш типу графіка та параметрів (дані, підписи, стиль, версія matplotlib)"""
+        content = repr((kind, matplotlib.__version__, params))
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _spill_file(self, key: str) -> Path:
+        return self.spill_dir / f'{key}.png'
+
+    def _spilled(self) -> List[Path]:
+        """Файли графіків каталогу spill_dir"""
+        if self.spill_dir is None or not self.spill_dir.is_dir():
+            return []
+        return list(self.spill_dir.glob('*.png'))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """PNG за ключем (пам'ять, далі - каталог витіснених графіків) або None"""
+        png = self._items.get(key)
+        if png is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return png
+        if self.spill_dir is None:
+            self.misses += 1
+            return None
+        try:
+            spill_file = self._spill_file(key)
+            png = spill_file.read_bytes()
+            os.utime(spill_file)  # час використання - для витіснення з каталогу
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.put(key, png)
+        return png
+
+    def put(self, key: str, png: bytes):
+        """Додавання графіка (найдавніше використані графіки понад max_items витісняються на диск)"""
+        self._items[key] = png
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            old_key, old_png = self._items.popitem(last=False)
+            self._spill(old_key, old_png)
+
+    def _spill(self, key: str, png: bytes):
+        if self.spill_dir is None:
+            return
+        spill_file = self._spill_file(key)
+        if spill_file.exists():
+            return
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = spill_file.with_suffix(f'.{os.getpid()}.tmp')  # запис з декількох процесів
+            tmp_file.write_bytes(png)
+            os.replace(tmp_file, spill_file)
+        except OSError:
+            return  # графік буде сформовано повторно
+        self._trim_spilled()
+
+    def _trim_spilled(self):
+        """Видалення найдавніше використаних графіків каталогу понад max_spilled"""
+        files = []
+        for spill_file in self._spilled():
+            try:
+                files.append((spill_file.stat().st_mtime, spill_file))
+            except OSError:
+                pass
+        if len(files) <= self.max_spilled:
+            return
+        files.sort()
+        for _, spill_file in files[:len(files) - self.max_spilled]:
+            try:
+                spill_file.unlink()
+            except OSError:
+                pass
+
+    def clear(self, spilled=True):
+        """Очищення кешу (spilled - видалення також графіків, витіснених на диск)"""
+        self._items.clear()
+        if spilled:
+            for spill_file in self._spilled():
+                try:
+                    spill_file.unlink()
+                except OSError:
+                    pass
+
+
+default_cache = ChartCache()  # спільний кеш графіків процесу у пам'яті (повторні експорти тих самих даних)
+
+
+def _bar_params(columns: Sequence[str], profit: Sequence[float], tax: Sequence[float],
+                income: Sequence[float]) -> tuple:
+    return (tuple(map(str, columns)), tuple(map(float, profit)), tuple(map(float, tax)),
+            tuple(map(float, income)))
+
+
+def _pie_params(vals: Sequence[float], labels: Sequence[str]) -> tuple:
+    return tuple(map(float, vals)), tuple(map(str, labels))
+
+
+# Приведення аргументів графіка кожного типу до параметрів формування (ключа кешу):
+_chart_params = {'bar': _bar_params, 'pie': _pie_params}
+
+
+class ChartRenderer:
+    """Формування графіків звіту у вигляді PNG (фігура кожного типу - одна на інстанс)"""
+
+    def __init__(self, chart_style: Optional[str] = None, cache: Optional[ChartCache] = default_cache):
+        """
+        :param chart_style: стиль matplotlib (None - перший доступний з CHART_STYLES)
+        :param cache: кеш сформованих графіків (None - без кешування)
+        """
+        self.style = chart_style or _available_style()
+        self.cache = cache
+        self._figures: Dict[str, Figure] = {}
+        self._pending: Dict[str, Future] = {}  # графіки, що формуються у пулі процесів (prerender)
+
+    def render(self, kind: str, params: tuple) -> bytes:
+        """Формування PNG графіка типу kind ('bar', 'pie') за параметрами (без кешу)"""
+        return getattr(self, f'_render_{kind}')(*params)
+
+    def _cached(self, kind: str, params: tuple) -> bytes:
+        """PNG з результату попереднього формування, з кешу або сформований (з додаванням до кешу)"""
+        key = ChartCache.key(kind, self.style, params)
+        future = self._pending.pop(key, None)
+        if future is not None:
+            png = future.result()
+        elif self.cache is None:
+            return self.render(kind, params)
+        else:
+            png = self.cache.get(key)
+            if png is not None:
+                return png
+            png = self.render(kind, params)
+        if self.cache is not None:
+            self.cache.put(key, png)
+        return png
+
+    def prerender(self, executor: Executor, jobs: Iterable[Tuple[str, dict]]) -> int:
+        """
+        Постановка графіків у чергу пулу процесів (графіки, наявні у кеші, не формуються повторно).
+        Звернення до графіка (bar_chart, pie_chart) очікує завершення відповідного завдання.
+
+        :param executor: пул процесів
+        :param jobs: графіки - (тип графіка, {аргументи методу bar_chart / pie_chart})
+        :return: кількість поставлених у чергу графіків
+        """
+        count = 0
+        for kind, kwargs in jobs:
+            params = _chart_params[kind](**kwargs)
+            key = ChartCache.key(kind, self.style, params)
+            if key in self._pending or (self.cache is not None and self.cache.get(key) is not None):
+                continue
+            self._pending[key] = executor.submit(_render_job, self.style, kind, params)
+            count += 1
+        return count
+
+    def _axes(self, kind: str, width: float, height: float) -> Axes:
+        """Очищені осі фігури графіка типу kind (фігура створюється при першому використанні)"""
+        fig = self._figures.get(kind)
+        if fig is None:
+            fig = Figure(dpi=100)
+            FigureCanvasAgg(fig)
+            fig.add_subplot()
+            self._figures[kind] = fig
+        fig.set_size_inches(width, height, forward=True)
+        # Положення осей - типове (розміри таблиць під графіком залежать від висоти осей на момент їх створення):
+        fig.subplots_adjust(**{param: rcParams[f'figure.subplot.{param}'] for param in _subplot_params})
+        ax = fig.axes[0]
+        ax.clear()
+        return ax
+
+    @staticmethod
+    def _png(fig: Figure) -> bytes:
+        memory_file = io.BytesIO()
+        fig.savefig(memory_file, format='png')
+        return memory_file.getvalue()
+
+    def bar_chart(self, columns: Sequence[str], profit: Sequence[float], tax: Sequence[float],
+                  income: Sequence[float]) -> bytes:
+        """
+        Гістограма доходу та прибутку по періодах з таблицею значень (тис. грн.) під графіком
+
+        :param columns: підписи періодів (роки або квартали)
+        :param profit: прибуток за кожен період
+        :param tax: податок за кожен період
+        :param income: дохід за кожен період
+        :return: PNG
+        """
+        return self._cached('bar', _bar_params(columns, profit, tax, income))
+
+    def _render_bar(self, columns, profit, tax, income) -> bytes:
+        data_np = np.array([profit, tax, income], dtype=float)
+        rows = ["Дохід", "Податок", 'Прибуток']
+
+        values = np.linspace(0, int(np.amax(data_np)), 5)  # положення підписів осі y
+        values_lbl = np.linspace(0, int(np.amax(data_np)) // 1000, 5)  # підписи осі y
+
+        colors = cm.BuPu(np.linspace(0, 0.5, len(rows)))
+        index = np.linspace(0.5, len(columns) - 0.5, len(columns))  # положення барів по осі х
+        bar_width = 0.5
+
+        cell_text = [['%d' % (x / 1000.0) for x in data_np[row]] for row in range(len(data_np))]
+        cell_text.reverse()  # значення для заповнення таблички під графіком
+
+        with style.context(self.style):
+            ax = self._axes('bar', 10, 3.5)
+            ax.set_xlim(0, len(columns))
+            ax.bar(index, data_np[2], bar_width, color=colors[2], edgecolor='black')
+            ax.bar(index, data_np[0], bar_width, color=colors[1], edgecolor='black')
+
+            the_table = ax.table(cellText=cell_text, rowLabels=rows, colLabels=list(columns), loc='bottom')
+            the_table.scale(1, 2)
+
+            ax.set_ylabel("Тисяч грн.")
+            ax.set_yticks(values, ['%d' % val for val in values_lbl])
+            ax.set_xticks([])
+            ax.figure.subplots_adjust(bottom=0.3)
+            ax.margins(x=0.0, y=0.05)
+            return self._png(ax.figure)
+
+    def pie_chart(self, vals: Sequence[float], labels: Sequence[str]) -> bytes:
+        """
+        Кругова діаграма часток доходу
+
+        :param vals: суми
+        :param labels: підписи секторів
+        :return: PNG
+        """
+        return self._cached('pie', _pie_params(vals, labels))
+
+    def _render_pie(self, vals, labels) -> bytes:
+        with style.context(self.style):
+            ax = self._axes('pie', 14, 6)
+            ax.margins(x=0.0, y=0.05)
+            patches, texts, autotexts = ax.pie(vals,
+                                               labels=labels,
+                                               autopct='%1.0f%%',
+                                               shadow=True,
+                                               startangle=90,
+                                               frame=False,
+                                               radius=1.1,
+                                               wedgeprops={"edgecolor": "k", 'linewidth': 0.8},
+                                               labeldistance=1.2,
+                                               explode=[0.05] * len(vals))
+            for t in texts:
+                t.set_fontsize(24)
+            for t in autotexts:
+                t.set_fontsize(24)
+            return self._png(ax.figure)
+
+    def close(self):
+        """Звільнення фігур та полотен (наступний графік створить нову фігуру), скасування невикористаних завдань"""
+        for fig in self._figures.values():
+            fig.clear()
+        self._figures = {}
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+
+    def __enter__(self) -> 'ChartRenderer':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_worker_renderer: Optional[ChartRenderer] = None  # інстанс ChartRenderer дочірнього процесу (prerender)
+
+
+def _render_job(chart_style: str, kind: str, params: tuple) -> bytes:
+    """Формування графіка у дочірньому процесі (фігури використовуються повторно для всіх завдань процесу)"""
+    global _worker_renderer
+    if _worker_renderer is None or _worker_renderer.style != chart_style:
+        _worker_renderer = ChartRenderer(chart_style, cache=None)
+    return _worker_renderer.render(kind, params)
@@ -0,0 +1,53 @@
+"""
+Довідники ознак (видів) доходу у вигляді масивів підстановки:
+словник {код: назва} компілюється один раз у щільний масив, індексований цілочисельним кодом,
+заміна кодів колонки на назви виконується одним take() замість DataFrame.replace
+"""
+
+from typing import Iterable, Union
+
+import numpy as np
+
+from defines import dict_long, dict_short
+
+
+class CodeLabels:
+    """Масив підстановки назв для цілочисельних кодів"""
+
+    def __init__(self, labels: dict):
+        codes = [int(code) for code in labels.keys()]
+        size = max(codes) + 1 if codes else 0
+        self.lut = np.empty(size, dtype=object)
+        self.known = np.zeros(size, dtype=bool)
+        for code, label in labels.items():
+            self.lut[int(code)] = label
+            self.known[int(code)] = True
+
+    def map(self, values: Union[np.ndarray, Iterable]) -> np.ndarray:
+        """
+        Заміна кодів на назви. Значення, відсутні у довіднику (або нецілочисельні), залишаються без змін -
+        аналогічно DataFrame.replace({колонка: словник}).
+
+        :param values: одновимірний масив (або Series) кодів
+        :return: масив (object) назв
+        """
+        arr = np.asarray(values)
+        result = arr.astype(object)
+        if arr.dtype.kind in 'iub':
+            codes = arr.astype(np.int64)
+            valid = np.ones(arr.shape[0], dtype=bool)
+        elif arr.dtype.kind == 'f':
+            valid = np.isfinite(arr) & (arr == np.floor(arr))
+            codes = np.where(valid, arr, -1).astype(np.int64)
+        else:
+            valid = np.fromiter((isinstance(x, (int, np.integer)) for x in arr), dtype=bool, count=arr.shape[0])
+            codes = np.full(arr.shape[0], -1, dtype=np.int64)
+            codes[valid] = arr[valid].astype(np.int64)
+        valid &= (codes >= 0) & (codes < self.lut.shape[0])
+        valid[valid] = self.known[codes[valid]]
+        result[valid] = self.lut.take(codes[valid])
+        return result
+
+
+labels_long = CodeLabels(dict_long)  # повні назви (таблиці Excel, таблиці документів)
+labels_short = CodeLabels(dict_short)  # скорочені назви (графіки, зведені таблиці)
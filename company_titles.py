@@ -0,0 +1,124 @@
+"""
+Скорочення найменувань організаційно-правових форм юридичних осіб (defines.dict_company_types):
+    - послідовні заміни словника об'єднуються в етапи - групи замін, які не можуть впливати одна на одну (збіги
+      записів та результати замін не перетинаються); етап виконується одним проходом скомпільованого шаблону
+      з альтернативами, результат ідентичний послідовному re.sub для кожного запису словника
+    - записи, що не є простим текстом (спецсимволи регулярних виразів, посилання у заміні), виконуються окремим
+      етапом re.sub, як і раніше
+    - результат кешується для кожного унікального найменування (агенти повторюються у таблицях всього звіту)
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Pattern, Tuple, Union
+
+from defines import dict_company_types
+
+_re_spaces = re.compile(' +')
+_re_special = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+
+def _is_literal(key: str, replacement: str) -> bool:
+    """Запис словника - простий текст (шаблон без спецсимволів, заміна без посилань на групи)"""
+    return _re_special.search(key) is None and '\\' not in replacement
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """Можливий перетин збігів текстів a та b (входження одного в інший або кінець одного - початок іншого)"""
+    if re.search(re.escape(a), b, re.IGNORECASE) or re.search(re.escape(b), a, re.IGNORECASE):
+        return True
+    for size in range(1, min(len(a), len(b))):
+        if re.fullmatch(re.escape(a[-size:]), b[:size], re.IGNORECASE) or \
+                re.fullmatch(re.escape(b[-size:]), a[:size], re.IGNORECASE):
+            return True
+    return False
+
+
+def build_stages(types: Dict[str, str]) -> List[Tuple[Pattern, Union[str, Callable]]]:
+    """
+    Етапи замін зі збереженням порядку словника: до етапу додається наступний запис, якщо його збіги не
+    перетинаються зі збігами та результатами замін записів етапу
+
+    :param types: {шаблон: скорочення} (скорочення застосовується у верхньому регістрі)
+    :return: [(скомпільований шаблон, заміна для pattern.sub)]
+    """
+    groups: List[List[Tuple[str, str]]] = []
+    literal_last = False  # останній етап - групи простих текстів (можна доповнити)
+    for key, value in types.items():
+        replacement = value.upper()
+        literal = _is_literal(key, replacement)
+        if literal and literal_last and all(not _overlaps(k, key) and not _overlaps(r, key) for k, r in groups[-1]):
+            groups[-1].append((key, replacement))
+        else:
+            groups.append([(key, replacement)])
+        literal_last = literal
+
+    stages = []
+    for group in groups:
+        if len(group) == 1 and not _is_literal(*group[0]):
+            stages.append((re.compile(group[0][0], re.IGNORECASE), group[0][1]))
+            continue
+        pattern = re.compile('|'.join(f'({re.escape(key)})' for key, _ in group), re.IGNORECASE)
+        replacements = [replacement for _, replacement in group]
+        stages.append((pattern, lambda match, reps=replacements: reps[match.lastindex - 1]))
+    return stages
+
+
+_stages = build_stages(dict_company_types)
+
+
+@lru_cache(maxsize=None)
+def company_title(full_name: str) -> str:
+    """Застосування скорочень до найменування організаційно-правової форми юридичної особи"""
+    full_name = _re_spaces.sub(' ', full_name)
+    for pattern, replacement in _stages:
+        full_name = pattern.sub(replacement, full_name)
+    return full_name
+
+
+if __name__ == '__main__':
+    # Перевірка ідентичності з послідовними замінами (випадкові найменування з фрагментів словника) та порівняння
+    # продуктивності
+    import random
+    import time
+
+    def company_title_legacy(full_name):
+        full_name = re.sub(' +', ' ', full_name)
+        for key, value in dict_company_types.items():
+            full_name = re.sub(key, value.upper(), full_name, flags=re.IGNORECASE)
+        return full_name
+
+    rnd = random.Random(1)
+    fragments = list(dict_company_types.keys()) + [v.upper() for v in dict_company_types.values()] + \
+        ['"РОМАШКА"', 'ЛАН', ' ', '  ', '-', ' - ', 'АРИСТВО', 'ТОВ', 'І', 'I', 'Ю', "'", 'З']
+
+    def random_name():
+        parts = []
+        for _ in range(rnd.randint(1, 6)):
+            part = rnd.choice(fragments)
+            if rnd.random() < 0.3:  # частина фрагмента
+                start = rnd.randint(0, len(part))
+                part = part[start:rnd.randint(start, len(part))]
+            if rnd.random() < 0.3:
+                part = part.lower()
+            parts.append(part)
+        return rnd.choice(['', ' ']).join(parts)
+
+    names = [random_name() for _ in range(100000)]
+    for name in names:
+        assert company_title(name) == company_title_legacy(name), name
+
+    sample = [rnd.choice(names[:300]) for _ in range(20000)]  # повторювані агенти звіту
+    company_title.cache_clear()
+    t_start = time.perf_counter()
+    for name in sample:
+        company_title_legacy(name)
+    t_legacy = time.perf_counter() - t_start
+    t_start = time.perf_counter()
+    for name in sample:
+        company_title(name)
+    t_fast = time.perf_counter() - t_start
+    print(f'етапів замін: {len(_stages)} (записів словника: {len(dict_company_types)}), '
+          f'перевірено найменувань: {len(names)}\n'
+          f'послідовні re.sub:  {t_legacy:.2f} s\n'
+          f'company_title:      {t_fast:.2f} s (x{t_legacy / t_fast:.1f})')
@@ -439,6 +439,6 @@ income           float64
 desc               int32
 person            object
 profit           float64
-year_quad          int64
+qord               int64
 dtype: object
 """
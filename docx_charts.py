@@ -0,0 +1,200 @@
+"""
+Вбудовані (нативні) графіки MS Word - частини пакету DrawingML без растрування matplotlib:
+    - гістограма доходу та прибутку по періодах з таблицею значень під графіком (c:barChart + c:dTable)
+    - кругова діаграма часток доходу (c:pieChart)
+    - значення графіка зберігаються у кеші частини графіка (відображення без перерахунку) та, за потреби, у вбудованій
+      книзі Excel (редагування даних графіка у MS Word)
+Графік додається до пакету документа окремою частиною (/word/charts/chartN.xml), пов'язаною з частиною документа,
+та вставляється у абзац як inline-об'єкт (wp:inline з посиланням c:chart r:id).
+"""
+
+import io
+from typing import Sequence
+from xml.sax.saxutils import escape
+
+from docx.document import Document as DocumentObject
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.part import Part
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Length
+from docx.text.run import Run
+
+CHART_URI = 'http://schemas.openxmlformats.org/drawingml/2006/chart'
+DATA_SHEET = 'Sheet1'  # аркуш вбудованої книги з даними графіка
+
+# Кольори гістограми (як у matplotlib cm.BuPu) та секторів кругової діаграми (палітра tab10):
+BAR_COLORS = {'Дохід': '8C95C6', 'Податок': None, 'Прибуток': 'BFD3E6'}  # None - без заливки (лише у таблиці)
+PIE_COLORS = ('1F77B4', 'FF7F0E', '2CA02C', 'D62728', '9467BD', '8C564B', 'E377C2', '7F7F7F', 'BCBD22', '17BECF')
+
+_external_rid = 'rId1'  # зв'язок частини графіка з вбудованою книгою (частина графіка нова - інших зв'язків немає)
+_text_pr = '<c:txPr><a:bodyPr/><a:lstStyle/><a:p><a:pPr><a:defRPr sz="%d"/></a:pPr>' \
+           '<a:endParaRPr lang="uk-UA"/></a:p></c:txPr>'
+
+
+def _col_letter(col: int) -> str:
+    """Літера колонки аркуша (0 - A, 1 - B...; графіки звіту мають до 26 серій)"""
+    return chr(ord('A') + col)
+
+
+def _str_xml(ref: str, values: Sequence[str], embed: bool) -> str:
+    """Рядкові значення (назва серії, категорії): посилання на книгу з кешем або значення без книги"""
+    points = ''.join(f'<c:pt idx="{idx}"><c:v>{escape(str(val))}</c:v></c:pt>' for idx, val in enumerate(values))
+    if embed:
+        return f'<c:strRef><c:f>{ref}</c:f><c:strCache><c:ptCount val="{len(values)}"/>{points}' \
+               f'</c:strCache></c:strRef>'
+    return f'<c:strLit><c:ptCount val="{len(values)}"/>{points}</c:strLit>'
+
+
+def _num_xml(ref: str, values: Sequence[float], embed: bool, format_code='General') -> str:
+    """Числові значення серії: посилання на книгу з кешем або значення без книги"""
+    points = ''.join(f'<c:pt idx="{idx}"><c:v>{float(val)!r}</c:v></c:pt>' for idx, val in enumerate(values))
+    content = f'<c:formatCode>{format_code}</c:formatCode><c:ptCount val="{len(values)}"/>{points}'
+    if embed:
+        return f'<c:numRef><c:f>{ref}</c:f><c:numCache>{content}</c:numCache></c:numRef>'
+    return f'<c:numLit>{content}</c:numLit>'
+
+
+def _series_xml(idx: int, name: str, categories: Sequence[str], values: Sequence[float], embed: bool,
+                format_code: str, sp_pr='', extra='') -> str:
+    """Серія графіка (дані - колонка idx + 1 аркуша, категорії - колонка A)"""
+    col = _col_letter(idx + 1)
+    last_row = len(categories) + 1
+    if embed:
+        tx = _str_xml(f'{DATA_SHEET}!${col}$1', [name], embed)
+    else:
+        tx = f'<c:v>{escape(name)}</c:v>'
+    return (f'<c:ser><c:idx val="{idx}"/><c:order val="{idx}"/><c:tx>{tx}</c:tx>{sp_pr}{extra}'
+            f'<c:cat>{_str_xml(f"{DATA_SHEET}!$A$2:$A${last_row}", categories, embed)}</c:cat>'
+            f'<c:val>{_num_xml(f"{DATA_SHEET}!${col}$2:${col}${last_row}", values, embed, format_code)}</c:val>'
+            f'</c:ser>')
+
+
+def _fill_xml(color) -> str:
+    """Оформлення фігури: заливка кольором з чорним контуром (None - без заливки та контуру)"""
+    if color is None:
+        return '<c:spPr><a:noFill/><a:ln><a:noFill/></a:ln></c:spPr>'
+    return f'<c:spPr><a:solidFill><a:srgbClr val="{color}"/></a:solidFill>' \
+           f'<a:ln w="9525"><a:solidFill><a:srgbClr val="000000"/></a:solidFill></a:ln></c:spPr>'
+
+
+def _chart_space_xml(plot_area: str, legend: str, embed: bool) -> bytes:
+    external = f'<c:externalData r:id="{_external_rid}"><c:autoUpdate val="0"/></c:externalData>' if embed else ''
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<c:chartSpace {nsdecls("c", "a", "r")}><c:lang val="uk-UA"/><c:roundedCorners val="0"/>'
+            f'<c:chart><c:autoTitleDeleted val="1"/>{plot_area}{legend}'
+            '<c:plotVisOnly val="1"/><c:dispBlanksAs val="gap"/></c:chart>'
+            '<c:spPr><a:noFill/><a:ln><a:noFill/></a:ln></c:spPr>'
+            f'{_text_pr % 900}{external}</c:chartSpace>').encode('utf-8')
+
+
+def _workbook_blob(categories: Sequence[str], series: Sequence[tuple]) -> bytes:
+    """Вбудована книга Excel з даними графіка (колонка A - категорії, наступні - серії)"""
+    from openpyxl import Workbook  # лише для графіків з вбудованими даними
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = DATA_SHEET
+    ws.append([''] + [name for name, _ in series])
+    for pos, category in enumerate(categories):
+        ws.append([category] + [float(values[pos]) for _, values in series])
+    memory_file = io.BytesIO()
+    wb.save(memory_file)
+    return memory_file.getvalue()
+
+
+def _add_chart(document: DocumentObject, run: Run, chart_xml: bytes, workbook: bytes, width: Length,
+               height: Length):
+    """Додавання частини графіка (та вбудованої книги) до пакету документа і вставка графіка у run"""
+    package = document.part.package
+    chart_part = Part(package.next_partname('/word/charts/chart%d.xml'), CT.DML_CHART, chart_xml, package)
+    if workbook is not None:
+        xlsx_part = Part(package.next_partname('/word/embeddings/Microsoft_Excel_Worksheet%d.xlsx'),
+                         CT.SML_SHEET, workbook, package)
+        chart_part.rels.add_relationship(RT.PACKAGE, xlsx_part, _external_rid)
+    r_id = document.part.relate_to(chart_part, RT.CHART)
+
+    shape_id = document.part.next_id
+    inline = parse_xml(
+        f'<wp:inline distT="0" distB="0" distL="0" distR="0" {nsdecls("wp", "a", "c", "r")}>'
+        f'<wp:extent cx="{int(width)}" cy="{int(height)}"/><wp:effectExtent l="0" t="0" r="0" b="0"/>'
+        f'<wp:docPr id="{shape_id}" name="Chart {shape_id}"/><wp:cNvGraphicFramePr/>'
+        f'<a:graphic><a:graphicData uri="{CHART_URI}"><c:chart r:id="{r_id}"/></a:graphicData></a:graphic>'
+        f'</wp:inline>')
+    run._r.add_drawing(inline)
+
+
+def add_bar_chart(document: DocumentObject, run: Run, columns: Sequence[str], profit: Sequence[float],
+                  tax: Sequence[float], income: Sequence[float], width: Length, height: Length, embed_data=True):
+    """
+    Гістограма доходу та прибутку по періодах з таблицею значень (тис. грн.) під графіком
+
+    :param document: документ python-docx
+    :param run: фрагмент абзацу для вставки графіка
+    :param columns: підписи періодів (роки або квартали)
+    :param profit: прибуток за кожен період
+    :param tax: податок за кожен період
+    :param income: дохід за кожен період
+    :param width: ширина графіка
+    :param height: висота графіка
+    :param embed_data: вбудувати книгу Excel з даними (редагування даних графіка у MS Word)
+    """
+    columns = [str(x) for x in columns]
+    # Серії у тис. грн. (порядок рядків таблиці під графіком; прибуток відображається поверх доходу):
+    series = [(name, [round(float(x) / 1000.0, 3) for x in values])
+              for name, values in (('Дохід', income), ('Податок', tax), ('Прибуток', profit))]
+    ser_xml = ''.join(_series_xml(idx, name, columns, values, embed_data, '0', _fill_xml(BAR_COLORS[name]),
+                                  '<c:invertIfNegative val="0"/>')
+                      for idx, (name, values) in enumerate(series))
+    plot_area = (
+        '<c:plotArea><c:layout/>'
+        f'<c:barChart><c:barDir val="col"/><c:grouping val="clustered"/><c:varyColors val="0"/>{ser_xml}'
+        '<c:gapWidth val="100"/><c:overlap val="100"/><c:axId val="1001"/><c:axId val="1002"/></c:barChart>'
+        '<c:catAx><c:axId val="1001"/><c:scaling><c:orientation val="minMax"/></c:scaling><c:delete val="0"/>'
+        '<c:axPos val="b"/><c:numFmt formatCode="General" sourceLinked="0"/><c:majorTickMark val="none"/>'
+        '<c:minorTickMark val="none"/><c:tickLblPos val="nextTo"/><c:crossAx val="1002"/>'
+        '<c:crosses val="autoZero"/><c:auto val="1"/><c:lblAlgn val="ctr"/><c:lblOffset val="100"/>'
+        '<c:noMultiLvlLbl val="0"/></c:catAx>'
+        '<c:valAx><c:axId val="1002"/><c:scaling><c:orientation val="minMax"/></c:scaling><c:delete val="0"/>'
+        '<c:axPos val="l"/><c:majorGridlines/>'
+        '<c:title><c:tx><c:rich><a:bodyPr rot="-5400000" vert="horz"/><a:lstStyle/>'
+        '<a:p><a:pPr><a:defRPr b="0"/></a:pPr><a:r><a:rPr lang="uk-UA" b="0"/><a:t>Тисяч грн.</a:t></a:r></a:p>'
+        '</c:rich></c:tx><c:overlay val="0"/></c:title>'
+        '<c:numFmt formatCode="0" sourceLinked="0"/><c:majorTickMark val="out"/><c:minorTickMark val="none"/>'
+        '<c:tickLblPos val="nextTo"/><c:crossAx val="1001"/><c:crosses val="autoZero"/>'
+        '<c:crossBetween val="between"/></c:valAx>'
+        '<c:dTable><c:showHorzBorder val="1"/><c:showVertBorder val="1"/><c:showOutline val="1"/>'
+        '<c:showKeys val="1"/></c:dTable>'
+        '</c:plotArea>')
+    workbook = _workbook_blob(columns, series) if embed_data else None
+    _add_chart(document, run, _chart_space_xml(plot_area, '', embed_data), workbook, width, height)
+
+
+def add_pie_chart(document: DocumentObject, run: Run, vals: Sequence[float], labels: Sequence[str],
+                  width: Length, height: Length, embed_data=True):
+    """
+    Кругова діаграма часток доходу (відсотки на секторах, підписи секторів - у легенді графіка)
+
+    :param document: документ python-docx
+    :param run: фрагмент абзацу для вставки графіка
+    :param vals: суми
+    :param labels: підписи секторів
+    :param width: ширина графіка
+    :param height: висота графіка
+    :param embed_data: вбудувати книгу Excel з даними (редагування даних графіка у MS Word)
+    """
+    labels = [str(x) for x in labels]
+    series = [('Дохід', [float(x) for x in vals])]
+    points = ''.join(f'<c:dPt><c:idx val="{idx}"/><c:bubble3D val="0"/>'
+                     f'{_fill_xml(PIE_COLORS[idx % len(PIE_COLORS)])}</c:dPt>' for idx in range(len(labels)))
+    labels_xml = ('<c:dLbls><c:numFmt formatCode="0%" sourceLinked="0"/><c:spPr><a:noFill/><a:ln><a:noFill/></a:ln>'
+                  f'</c:spPr>{_text_pr % 1200}<c:dLblPos val="ctr"/><c:showLegendKey val="0"/><c:showVal val="0"/>'
+                  '<c:showCatName val="0"/><c:showSerName val="0"/><c:showPercent val="1"/>'
+                  '<c:showBubbleSize val="0"/><c:showLeaderLines val="0"/></c:dLbls>')
+    ser_xml = _series_xml(0, series[0][0], labels, series[0][1], embed_data, '#,##0.00', '',
+                          f'<c:explosion val="5"/>{points}{labels_xml}')
+    plot_area = (f'<c:plotArea><c:layout/><c:pieChart><c:varyColors val="1"/>{ser_xml}'
+                 '<c:firstSliceAng val="0"/></c:pieChart></c:plotArea>')
+    legend = f'<c:legend><c:legendPos val="r"/><c:overlay val="0"/>{_text_pr % 1000}</c:legend>'
+    workbook = _workbook_blob(labels, series) if embed_data else None
+    _add_chart(document, run, _chart_space_xml(plot_area, legend, embed_data), workbook, width, height)
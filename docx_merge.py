@@ -0,0 +1,70 @@
+"""
+Об'єднання документів python-docx (частини звіту, сформовані в окремих процесах):
+    - елементи тіла документа-частини переносяться в кінець основного документа (перед параметрами розділу)
+    - зображення частини додаються до пакету основного документа, посилання (r:embed) оновлюються
+    - вбудовані графіки (разом з пов'язаними частинами - книгами Excel з даними) копіюються у пакет основного
+      документа з новими назвами частин, посилання (c:chart r:id) оновлюються
+    - ідентифікатори зображень та графіків (wp:docPr) перенумеровуються наскрізно, як при послідовному додаванні
+Стилі не копіюються - документи-частини створюються з тими самими стилями, що й основний документ.
+"""
+
+import io
+import re
+
+from docx.document import Document as DocumentObject
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.package import OpcPackage
+from docx.opc.part import Part
+from docx.oxml.ns import qn
+
+_embed_attr = qn('r:embed')
+_id_attr = qn('r:id')
+_re_partname_num = re.compile(r'\d*(\.\w+)$')
+_re_shape_num = re.compile(r'\d+$')
+
+
+def _copy_part(part: Part, package: OpcPackage) -> Part:
+    """Копія частини (та пов'язаних з нею частин) у пакеті package з наступним вільним номером у назві"""
+    template = _re_partname_num.sub(r'%d\1', part.partname)
+    new_part = Part(package.next_partname(template), part.content_type, part.blob, package)
+    for rel in part.rels.values():
+        target = rel.target_ref if rel.is_external else _copy_part(rel.target_part, package)
+        new_part.rels.add_relationship(rel.reltype, target, rel.rId, rel.is_external)
+    return new_part
+
+
+def append_document(dest: DocumentObject, src: DocumentObject):
+    """
+    Перенесення вмісту документа src у кінець документа dest
+
+    :param dest: основний документ
+    :param src: документ-частина (після перенесення не використовується)
+    """
+    dest_body = dest.element.body
+    sect_pr = dest_body.find(qn('w:sectPr'))
+    next_id = dest.part.next_id
+    rel_map = {}  # {rId частини: rId основного документа}
+
+    for element in list(src.element.body):
+        if element.tag == qn('w:sectPr'):
+            continue
+        for blip in element.iter(qn('a:blip')):
+            src_rid = blip.get(_embed_attr)
+            if src_rid not in rel_map:
+                image_part = src.part.related_parts[src_rid]
+                rel_map[src_rid], _ = dest.part.get_or_add_image(io.BytesIO(image_part.blob))
+            blip.set(_embed_attr, rel_map[src_rid])
+        for chart in element.iter(qn('c:chart')):
+            src_rid = chart.get(_id_attr)
+            if src_rid not in rel_map:
+                chart_part = _copy_part(src.part.related_parts[src_rid], dest.part.package)
+                rel_map[src_rid] = dest.part.relate_to(chart_part, RT.CHART)
+            chart.set(_id_attr, rel_map[src_rid])
+        for doc_pr in element.iter(qn('wp:docPr')):
+            doc_pr.set('id', str(next_id))
+            doc_pr.set('name', _re_shape_num.sub(str(next_id), doc_pr.get('name')))
+            next_id += 1
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            dest_body.append(element)
@@ -0,0 +1,182 @@
+"""
+Швидке формування таблиць документа python-docx:
+    - таблиця (стиль, сітка колонок) створюється python-docx без рядків
+    - всі рядки (ширина клітинок, заливка та жирний шрифт заголовків, вирівнювання) формуються одним рядком XML
+      з матриці текстових значень та додаються до таблиці одним розбором lxml
+    - результат ідентичний заповненню таблиці через об'єкти python-docx (cell.text, cell.width, alignment...)
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from docx.document import Document as DocumentObject
+from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Length
+from docx.table import Table
+
+HEADER_FILL = 'd9d9d9'  # колір заливки заголовків таблиць
+
+_re_special = re.compile(r'([\t\r\n])')
+
+
+def _run_xml(text: str, bold=False) -> str:
+    """Вміст w:r для тексту (табуляція та перенесення рядка - окремими елементами, як у python-docx)"""
+    parts = ['<w:rPr><w:b/></w:rPr>'] if bold else []
+    for chunk in _re_special.split(text):
+        if not chunk:
+            continue
+        if chunk == '\t':
+            parts.append('<w:tab/>')
+        elif chunk in '\r\n':
+            parts.append('<w:br/>')
+        elif len(chunk.strip()) < len(chunk):
+            parts.append(f'<w:t xml:space="preserve">{escape(chunk)}</w:t>')
+        else:
+            parts.append(f'<w:t>{escape(chunk)}</w:t>')
+    if not parts:
+        return '<w:r/>'
+    return '<w:r>' + ''.join(parts) + '</w:r>'
+
+
+def merge_spans(rows: Sequence[Sequence[str]], columns: Sequence[int]) -> Dict[int, List[Optional[str]]]:
+    """
+    Вертикальне злиття клітинок ієрархічної таблиці, у якій значення групи зазначається лише у першому рядку
+    групи (наступні клітинки групи - порожні): 'restart' - початок злиття, 'continue' - продовження, None - без злиття
+
+    :param rows: рядки таблиці (без заголовка)
+    :param columns: колонки, клітинки яких зливаються
+    :return: {колонка: [позначка для кожного рядка]}
+    """
+    spans = {}
+    for col in columns:
+        marks = []
+        start = None  # перший рядок поточної групи
+        for pos, row in enumerate(rows):
+            if row[col] != '':
+                marks.append(None)
+                start = pos
+            elif start is None:  # порожні клітинки до першого значення не зливаються
+                marks.append(None)
+            else:
+                marks[start] = 'restart'
+                marks.append('continue')
+        spans[col] = marks
+    return spans
+
+
+def add_table(document: DocumentObject,
+              headers: Sequence[str],
+              rows: Sequence[Sequence[str]],
+              widths: Sequence[Length],
+              alignments: Optional[Sequence[WD_PARAGRAPH_ALIGNMENT]] = None,
+              v_align_cols: Sequence[int] = (),
+              v_merge: Optional[Dict[int, List[Optional[str]]]] = None) -> Table:
+    """
+    Додавання таблиці в кінець документа
+
+    :param document: документ python-docx
+    :param headers: заголовки колонок (заливка, жирний шрифт, вирівнювання по центру)
+    :param rows: рядки таблиці - списки текстових значень клітинок
+    :param widths: ширина кожної колонки
+    :param alignments: вирівнювання тексту кожної колонки (рядки даних), None - без вирівнювання
+    :param v_align_cols: колонки з вертикальним вирівнюванням по центру (всі рядки)
+    :param v_merge: вертикальне злиття клітинок даних {колонка: ['restart' / 'continue' / None для кожного рядка]}
+                    (див. merge_spans), клітинки продовження злиття містять порожній абзац
+    :return: таблиця python-docx
+    """
+    cols = len(headers)
+    tab = document.add_table(rows=0, cols=cols)
+    tab.allow_autofit = False
+    tab.style = 'Table Grid'
+
+    tc_w = [f'<w:tcW w:type="dxa" w:w="{width.twips}"/>' for width in widths]
+    v_align = ['<w:vAlign w:val="%s"/>' % WD_CELL_VERTICAL_ALIGNMENT.to_xml(WD_CELL_VERTICAL_ALIGNMENT.CENTER)
+               if col in v_align_cols else '' for col in range(cols)]
+    p_pr_header = '<w:pPr><w:jc w:val="%s"/></w:pPr>' % WD_PARAGRAPH_ALIGNMENT.to_xml(WD_PARAGRAPH_ALIGNMENT.CENTER)
+    if alignments is None:
+        p_pr = [''] * cols
+    else:
+        p_pr = ['<w:pPr><w:jc w:val="%s"/></w:pPr>' % WD_PARAGRAPH_ALIGNMENT.to_xml(align) for align in alignments]
+
+    v_merge = v_merge or {}
+    merge_xml = {'restart': '<w:vMerge w:val="restart"/>', 'continue': '<w:vMerge/>', None: ''}
+
+    parts = ['<w:tbl %s><w:tr>' % nsdecls('w')]
+    for col, header in enumerate(headers):
+        parts.append(f'<w:tc><w:tcPr>{tc_w[col]}<w:shd w:fill="{HEADER_FILL}"/>{v_align[col]}</w:tcPr>'
+                     f'<w:p>{p_pr_header}{_run_xml(str(header), bold=True)}</w:p></w:tc>')
+    parts.append('</w:tr>')
+    for pos, row in enumerate(rows):
+        parts.append('<w:tr>')
+        for col in range(cols):
+            merge = v_merge[col][pos] if col in v_merge else None
+            if merge == 'continue':
+                content = f'<w:p>{p_pr[col]}</w:p>'
+            else:
+                content = f'<w:p>{p_pr[col]}{_run_xml(str(row[col]))}</w:p>'
+            parts.append(f'<w:tc><w:tcPr>{tc_w[col]}{merge_xml[merge]}{v_align[col]}</w:tcPr>{content}</w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+
+    tbl = tab._tbl
+    for tr in parse_xml(''.join(parts)):
+        tbl.append(tr)
+    return tab
+
+
+if __name__ == '__main__':
+    # Порівняння продуктивності (таблиця 3000 x 5): заповнення через об'єкти python-docx та одним проходом XML
+    import time
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.shared import Cm
+    from docx.table import _Cell
+
+    headers_b = ['Період', 'Агент', 'Дохід', 'Податок', 'Ознака доходу']
+    data_b = [[f'{2019 + i % 4} ({i % 4 + 1}кв.)', f'ТОВ "АГЕНТ {i % 37}" (код {12345670 + i % 37})',
+               f'{i * 17 % 100000} 123.45', f'{i * 3 % 10000} 512.10', 'Заробітна плата, нарахована (виплачена)']
+              for i in range(3000)]
+    widths_b = (Cm(2), Cm(5.5), Cm(2), Cm(2), Cm(5.5))
+    aligns_b = (WD_PARAGRAPH_ALIGNMENT.CENTER, WD_PARAGRAPH_ALIGNMENT.LEFT, WD_PARAGRAPH_ALIGNMENT.RIGHT,
+                WD_PARAGRAPH_ALIGNMENT.RIGHT, WD_PARAGRAPH_ALIGNMENT.LEFT)
+
+    t_start = time.perf_counter()
+    doc_legacy = Document()
+    tab_legacy = doc_legacy.add_table(rows=len(data_b) + 1, cols=len(headers_b))
+    tab_legacy.allow_autofit = False
+    tab_legacy.style = 'Table Grid'
+    cells = [[]]
+    for tc in tab_legacy._tbl.iter_tcs():
+        cells[-1].append(_Cell(tc, tab_legacy))
+        if len(cells[-1]) == len(headers_b):
+            cells.append([])
+    for pos, header in enumerate(headers_b):
+        cells[0][pos].text = header
+        shade = OxmlElement('w:shd')
+        shade.set(qn('w:fill'), HEADER_FILL)
+        cells[0][pos]._tc.get_or_add_tcPr().append(shade)
+    for i, row_b in enumerate(data_b):
+        for j, value in enumerate(row_b):
+            cells[i + 1][j].text = value
+            cells[i + 1][j].paragraphs[0].alignment = aligns_b[j]
+    for pos in range(len(headers_b)):
+        cells[0][pos].paragraphs[0].runs[0].font.bold = True
+        cells[0][pos].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    for i in range(len(data_b) + 1):
+        for j, width in enumerate(widths_b):
+            cells[i][j].width = width
+    t_legacy = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    doc_fast = Document()
+    tab_fast = add_table(doc_fast, headers_b, data_b, widths_b, alignments=aligns_b)
+    t_fast = time.perf_counter() - t_start
+
+    assert tab_legacy._tbl.xml == tab_fast._tbl.xml, 'XML таблиць відрізняється'
+    print(f'python-docx (клітинки):  {t_legacy:.2f} s\n'
+          f'add_table (XML):         {t_fast:.2f} s (x{t_legacy / t_fast:.1f})')
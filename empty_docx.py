@@ -12,6 +12,10 @@ class _DocEditorEmpty:
     """
 
     def __init__(self):
+        self.new_document()
+
+    def new_document(self):
+        """Створення порожнього документу з типовими налаштуваннями (замінює поточний документ інстансу)"""
         self.document = Document()
         self.sections = self.document.sections
         """Розмір полів"""
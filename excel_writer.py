@@ -0,0 +1,109 @@
+"""
+Потоковий запис таблиць MS Excel (openpyxl, режим write-only):
+    - рядки записуються порціями (chunk) безпосередньо з колонок вихідного датафрейму
+    - форматування застосовується до кожної порції окремо
+    - обсяг пам'яті обмежується розміром порції, а не кількістю записів
+    - суми записуються числами з форматом відображення клітинок (придатні до обчислень у Excel)
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.worksheet import Worksheet
+
+# Формат відображення сум: розділювач груп розрядів відповідає регіональним налаштуванням Excel
+# (для української локалі - пробіл: 12 890.00)
+AMOUNT_NUMBER_FORMAT = '#,##0.00'
+
+EXCEL_MAX_ROWS = 1048576  # максимальна кількість рядків аркуша Excel (разом із заголовком)
+
+
+class ExcelStreamWriter:
+    """
+    Запис однієї книги Excel у потоковому режимі. Аркуші додаються послідовно (write_sheet),
+    після запису всіх аркушів викликається save().
+    """
+
+    def __init__(self, file: Union[str, Path], chunk_size: int = 50000, max_rows: int = EXCEL_MAX_ROWS):
+        assert chunk_size > 0, "Розмір порції має бути більше 0"
+        assert max_rows > 1, "Аркуш має містити заголовок та хоча б один рядок даних"
+        self.file = Path(file)
+        self.chunk_size = chunk_size
+        self.max_rows = max_rows
+        self.workbook = Workbook(write_only=True)
+
+    @staticmethod
+    def sheet_titles(title: str, rows: int, max_rows: int = EXCEL_MAX_ROWS) -> List[str]:
+        """
+        Назви аркушів для запису rows рядків даних: основний аркуш та аркуші продовження (title_2, title_3...),
+        якщо кількість рядків перевищує ліміт аркуша Excel
+        """
+        sheets_count = max(-(-rows // (max_rows - 1)), 1)
+        titles = [title[:31]]
+        for num in range(2, sheets_count + 1):
+            suffix = f'_{num}'
+            titles.append(title[:31 - len(suffix)] + suffix)
+        return titles
+
+    def write_sheet(self,
+                    title: str,
+                    df: pd.DataFrame,
+                    formatter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                    number_formats: Optional[Dict[str, str]] = None):
+        """
+        Запис датафрейму на новий аркуш книги
+
+        :param title: назва аркуша
+        :param df: вихідний (неформатований) датафрейм
+        :param formatter: функція форматування порції записів (отримує та повертає датафрейм)
+        :param number_formats: формати відображення чисел {назва колонки (після форматування): формат}
+        :return: назви записаних аркушів (рядки понад ліміт аркуша переносяться на аркуші продовження)
+        """
+        number_formats = number_formats or {}
+        titles = self.sheet_titles(title, df.shape[0], self.max_rows)
+        sheet_rows = self.max_rows - 1  # рядків даних на аркуші
+        sheet = None
+        header = []
+        formatted_pos = {}  # {позиція колонки: формат}
+        written = 0
+        for start in range(0, max(df.shape[0], 1), self.chunk_size):
+            chunk = df.iloc[start:start + self.chunk_size]
+            if formatter is not None:
+                chunk = formatter(chunk)
+            if sheet is None:
+                header = [str(col) for col in chunk.columns]
+                formatted_pos = {pos: number_formats[col] for pos, col in enumerate(chunk.columns)
+                                 if col in number_formats}
+                sheet = self.workbook.create_sheet(title=titles[0])
+                sheet.append(header)
+            for row in chunk.itertuples(index=False, name=None):
+                if written and written % sheet_rows == 0:  # перехід на аркуш продовження
+                    sheet = self.workbook.create_sheet(title=titles[written // sheet_rows])
+                    sheet.append(header)
+                if formatted_pos:
+                    row = list(row)
+                    for pos, num_format in formatted_pos.items():
+                        cell = WriteOnlyCell(sheet, value=row[pos])
+                        cell.number_format = num_format
+                        row[pos] = cell
+                sheet.append(row)
+                written += 1
+        return titles
+
+    def save(self):
+        """Збереження книги у файл (книга у режимі write-only може бути збережена лише один раз)"""
+        self.workbook.save(self.file)
+
+
+def apply_number_formats(sheet: Worksheet, number_formats: Dict[str, str]):
+    """Застосування форматів відображення чисел до колонок аркуша (звичайний режим openpyxl, заголовок - 1 рядок)"""
+    headers = {cell.value: cell.column for cell in sheet[1]}
+    for col_name, num_format in number_formats.items():
+        col_idx = headers.get(col_name)
+        if col_idx is None:
+            continue
+        for (cell,) in sheet.iter_rows(min_row=2, min_col=col_idx, max_col=col_idx):
+            cell.number_format = num_format
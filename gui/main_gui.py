@@ -397,6 +397,9 @@ class Ui_MainWindow(object):
         self.cb_det_tab = QtWidgets.QCheckBox(self.gb_word)
         self.cb_det_tab.setObjectName("cb_det_tab")
         self.verticalLayout_6.addWidget(self.cb_det_tab)
+        self.cb_word_sep = QtWidgets.QCheckBox(self.gb_word)
+        self.cb_word_sep.setObjectName("cb_word_sep")
+        self.verticalLayout_6.addWidget(self.cb_word_sep)
         self.line_2 = QtWidgets.QFrame(self.gb_word)
         self.line_2.setEnabled(False)
         self.line_2.setMaximumSize(QtCore.QSize(265, 16777215))
@@ -460,6 +463,9 @@ class Ui_MainWindow(object):
         self.rb_excel_sep = QtWidgets.QRadioButton(self.gb_excel)
         self.rb_excel_sep.setObjectName("rb_excel_sep")
         self.verticalLayout_7.addWidget(self.rb_excel_sep)
+        self.rb_excel_sheets = QtWidgets.QRadioButton(self.gb_excel)
+        self.rb_excel_sheets.setObjectName("rb_excel_sheets")
+        self.verticalLayout_7.addWidget(self.rb_excel_sheets)
         self.horizontalLayout_2.addLayout(self.verticalLayout_7)
         self.b_excel = QtWidgets.QPushButton(self.gb_excel)
         self.b_excel.setMinimumSize(QtCore.QSize(50, 50))
@@ -497,6 +503,7 @@ class Ui_MainWindow(object):
         self.cb_det_years.setText(_translate("MainWindow", "Деталізувати по роках"))
         self.cb_det_types.setText(_translate("MainWindow", "Деталізувати по видам доходу"))
         self.cb_det_tab.setText(_translate("MainWindow", "Додати основну таблицю"))
+        self.cb_word_sep.setText(_translate("MainWindow", "Окремий файл щодо кожної особи"))
         self.rb_sublist_off.setText(_translate("MainWindow", "Не розгортати пункти"))
         self.rb_sublist_text.setText(_translate("MainWindow", "Підпункти списком"))
         self.rb_sublist_table.setText(_translate("MainWindow", "Підпункти таблицями"))
@@ -505,4 +512,5 @@ class Ui_MainWindow(object):
         self.cb_add_profi_col.setText(_translate("MainWindow", "Колонка прибутку (= дохід - податок)"))
         self.rb_excel_com.setText(_translate("MainWindow", "всі записи в одному файлі"))
         self.rb_excel_sep.setText(_translate("MainWindow", "окремий файл щодо кожної особи"))
+        self.rb_excel_sheets.setText(_translate("MainWindow", "окремий аркуш щодо кожної особи"))
 import gui.res_icons
@@ -20,6 +20,7 @@ https://www.flaticon.com/free-icons/excel - Excel icons created by Bharat Icons
 
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox, QProgressBar
@@ -56,25 +57,8 @@ class AppWin(QMainWindow, Ui_MainWindow):
 
         # Створення тимчасового прогресбару
         self.statusbar.showMessage('Завантаження XML...', 5000)
-        self.progressBar = QProgressBar()
-        self.progressBar.setMaximumHeight(18)
-        self.progressBar.setMinimumHeight(18)
-        self.progressBar.setStyleSheet("""QProgressBar {
-                                                border: 2px solid rgb(211, 211, 211);
-                                                border-radius: 7px;
-                                                background-color: rgb(211, 211, 211);
-                                                text-align: center;
-                                            }
-                                            QProgressBar::chunk {
-                                                background-color: rgb(246, 191, 39);
-                                                width: 7px; 
-                                                margin: 0.5px;
-                                                border-radius :2px;
-                                            }""")
-        self.statusBar().addPermanentWidget(self.progressBar)
+        self.progressBar = self._create_progress_bar()
         self.progressBar.setMaximum(len(user_files[0]) - 1)
-        self.progressBar.setMinimum(0)
-        self.progressBar.setValue(0)
 
         # Ітерування файлів:
         for pos, file in enumerate(user_files[0]):
@@ -91,8 +75,9 @@ class AppWin(QMainWindow, Ui_MainWindow):
             result_info += warnings
 
             if cur_df.df.shape[0] > 0:  # якщо є хоча б один розпізнаний запис
-                self.data.add_df(cur_df.df)
-                result_info += f'OK. Додано записів: {cur_df.df.shape[0]}\n'
+                rows_before = self.data.df.shape[0]
+                result_info += self.data.add_df(cur_df.df, source=file_name)
+                result_info += f'OK. Додано записів: {self.data.df.shape[0] - rows_before}\n'
             else:
                 result_info += 'ЗАПИСИ ВІДСУТНІ\n'
 
@@ -139,12 +124,45 @@ class AppWin(QMainWindow, Ui_MainWindow):
             self.statusbar.showMessage('Збереження Excel...', 5000)
             QApplication.processEvents()
             self.data: MultiFileDrfoData
+            self.progressBar = self._create_progress_bar()
             self.data.save_excel(new_file[0],
                                  separate=self.rb_excel_sep.isChecked(),
+                                 by_sheets=self.rb_excel_sheets.isChecked(),
                                  format_float=self.cb_float_format.isChecked(),
-                                 add_profit_column=self.cb_add_profi_col.isChecked())
+                                 add_profit_column=self.cb_add_profi_col.isChecked(),
+                                 stream=True,
+                                 progress_callback=self._update_progress)
+            self.statusbar.removeWidget(self.progressBar)
             self.statusbar.showMessage('Запис Excel файлу завершено', 5000)
 
+    def _create_progress_bar(self) -> QProgressBar:
+        """Створення тимчасового прогресбару у рядку статусу"""
+        progress_bar = QProgressBar()
+        progress_bar.setMaximumHeight(18)
+        progress_bar.setMinimumHeight(18)
+        progress_bar.setStyleSheet("""QProgressBar {
+                                                border: 2px solid rgb(211, 211, 211);
+                                                border-radius: 7px;
+                                                background-color: rgb(211, 211, 211);
+                                                text-align: center;
+                                            }
+                                            QProgressBar::chunk {
+                                                background-color: rgb(246, 191, 39);
+                                                width: 7px; 
+                                                margin: 0.5px;
+                                                border-radius :2px;
+                                            }""")
+        self.statusBar().addPermanentWidget(progress_bar)
+        progress_bar.setMinimum(0)
+        progress_bar.setValue(0)
+        return progress_bar
+
+    def _update_progress(self, done: int, total: int):
+        """Оновлення прогресбару (callback для тривалих операцій запису)"""
+        self.progressBar.setMaximum(total)
+        self.progressBar.setValue(done)
+        QApplication.processEvents()
+
     def save_word(self):
         new_file = QFileDialog.getSaveFileName(self, "Збереження звіту", '', 'Файл Word (*.docx)')
         if new_file[0] != '':
@@ -156,33 +174,18 @@ class AppWin(QMainWindow, Ui_MainWindow):
                                  add_tab=self.cb_det_tab.isChecked(),
                                  sub_list_text=self.rb_sublist_text.isChecked(),
                                  sub_list_table=self.rb_sublist_table.isChecked())
-            available_persons = word_doc.get_available_persons()
-            self.progressBar = QProgressBar()
-            self.progressBar.setMaximumHeight(18)
-            self.progressBar.setMinimumHeight(18)
-            self.progressBar.setStyleSheet("""QProgressBar {
-                                                    border: 2px solid rgb(211, 211, 211);
-                                                    border-radius: 7px;
-                                                    background-color: rgb(211, 211, 211);
-                                                    text-align: center;
-                                                }
-                                                QProgressBar::chunk {
-                                                    background-color: rgb(246, 191, 39);
-                                                    width: 7px; 
-                                                    margin: 0.5px;
-                                                    border-radius :2px;
-                                                }""")
-            self.statusBar().addPermanentWidget(self.progressBar)
-            self.progressBar.setMaximum(len(available_persons)-1)
-            self.progressBar.setMinimum(0)
-            self.progressBar.setValue(0)
-
-            for pos, person in enumerate(available_persons):
-                word_doc.write_person_to_document(person)
-                self.progressBar.setValue(pos)
-                QApplication.processEvents()
-
-            word_doc.save_docx(new_file[0])
+            self.progressBar = self._create_progress_bar()
+            if self.cb_word_sep.isChecked():
+                new_path = Path(new_file[0])
+                word_doc.save_docx_split(new_path.parent, prefix=new_path.stem,
+                                         progress_callback=self._update_progress)
+            elif word_doc.add_years or word_doc.add_signs:
+                # Графіки формуються заздалегідь у пулі процесів, документ - послідовно:
+                word_doc.write_persons_prerendered(progress_callback=self._update_progress)
+                word_doc.save_docx(new_file[0])
+            else:
+                word_doc.write_persons_parallel(progress_callback=self._update_progress)
+                word_doc.save_docx(new_file[0])
             self.statusbar.removeWidget(self.progressBar)
             self.statusbar.showMessage('Запис Word файлу завершено', 5000)
 
@@ -196,6 +199,7 @@ def run_gui():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # дочірні процеси запису у зібраному (pyinstaller) застосунку
     run_gui()
 """
 Для заміни у генерованому файлі інтерфейсу:
@@ -0,0 +1,75 @@
+"""
+Розрахунок періодів у кварталах:
+    - порядковий номер кварталу (qord = рік * 4 + квартал - 1) - суміжні квартали мають суміжні номери,
+      тривалість, діапазони та безперервність періодів розраховуються цілочисельно
+    - періоди безперервних надходжень (послідовні квартали) для всіх груп записів одним проходом по відсортованих
+      масивах (група, квартал): '1.2020 - 4.2020, 2.2021'
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def quarter_ordinal(year: pd.Series, quad: pd.Series) -> pd.Series:
+    """
+    Порядковий номер кварталу (векторизовано)
+
+    :param year: роки
+    :param quad: квартали (1-4)
+    :return: рік * 4 + квартал - 1 (NaN - для нечислових або відсутніх значень)
+    """
+    return pd.to_numeric(year, errors='coerce') * 4 + pd.to_numeric(quad, errors='coerce') - 1
+
+
+def split_ordinal(qord: int) -> Tuple[int, int]:
+    """Рік та квартал (1-4) за порядковим номером кварталу"""
+    year, quad = divmod(int(qord), 4)
+    return year, quad + 1
+
+
+def quarter_label(qord: int) -> str:
+    """Підпис кварталу формату 'квартал.рік' (3.2021)"""
+    year, quad = split_ordinal(qord)
+    return f'{quad}.{year}'
+
+
+def _labels(qords: np.ndarray) -> pd.Series:
+    """Підписи кварталів формату 'квартал.рік' (векторизовано)"""
+    return pd.Series(qords % 4 + 1).astype(str) + '.' + pd.Series(qords // 4).astype(str)
+
+
+def work_periods(df: pd.DataFrame, keys: List[str], qord='qord') -> pd.Series:
+    """
+    Періоди безперервних надходжень щодо кожної групи записів (напр. особа - агент): послідовні квартали
+    об'єднуються у діапазон 'квартал.рік - квартал.рік', окремий квартал - 'квартал.рік', періоди - через кому
+    у порядку зростання. Записи з відсутніми значеннями ключів або кварталу не враховуються.
+
+    :param df: датафрейм записів
+    :param keys: колонки групування
+    :param qord: колонка порядкового номера кварталу
+    :return: Series періодів з індексом за ключами групування
+    """
+    data = df[keys + [qord]].dropna().drop_duplicates().sort_values(keys + [qord], kind='mergesort')
+    if data.empty:
+        return pd.Series(dtype=object, name='periods')
+    quarters = data[qord].to_numpy(dtype=np.int64)
+
+    # Початок нового періоду: інша група або розрив між кварталами:
+    starts = np.ones(quarters.shape[0], dtype=bool)
+    starts[1:] = np.diff(quarters) != 1
+    for key in keys:
+        values = data[key].to_numpy()
+        starts[1:] |= values[1:] != values[:-1]
+    first_pos = np.flatnonzero(starts)
+    last_pos = np.append(first_pos[1:] - 1, quarters.shape[0] - 1)
+
+    first = quarters[first_pos]
+    last = quarters[last_pos]
+    first_lbl = _labels(first)
+    labels = first_lbl.where(first == last, first_lbl + ' - ' + _labels(last))
+
+    runs = data.iloc[first_pos][keys].reset_index(drop=True)
+    runs['periods'] = labels
+    return runs.groupby(keys, sort=True)['periods'].agg(', '.join)
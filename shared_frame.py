@@ -0,0 +1,127 @@
+"""
+Розміщення датафрейму ДРФО у спільній пам'яті (multiprocessing.shared_memory) для паралельної обробки:
+    - числові колонки - окремий блок пам'яті для кожного типу даних (колонки x рядки)
+    - текстові колонки - словникове кодування (int32 коди у спільній пам'яті, словник значень у дескрипторі)
+    - дочірній процес отримує лише невеликий дескриптор та відновлює датафрейм (тільки читання) з представлень
+      NumPy на спільну пам'ять без копіювання числових даних
+"""
+
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import pandas as pd
+import numpy as np
+
+
+class SharedDrfoFrame:
+    """
+    Датафрейм, розміщений у спільній пам'яті.
+    Процес-власник створює інстанс через from_df() та після завершення паралельної обробки викликає release().
+    Дочірні процеси отримують дескриптор (descriptor) та відкривають дані через attach(), після використання - close().
+    """
+
+    def __init__(self, descriptor: dict, blocks: List[shared_memory.SharedMemory], owner: bool):
+        self.descriptor = descriptor
+        self.blocks = blocks
+        self.owner = owner
+        self._df: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'SharedDrfoFrame':
+        """Копіювання колонок датафрейму у блоки спільної пам'яті та формування дескриптора"""
+        rows = df.shape[0]
+        groups = {}  # {dtype: [колонки]} - числові колонки групуються за типом у один двовимірний блок
+        encoded = []  # текстові колонки (словникове кодування)
+        for col in df.columns:
+            dtype = df[col].dtype
+            if dtype.kind in 'iufb':
+                groups.setdefault(dtype.str, []).append(col)
+            else:
+                encoded.append(col)
+
+        blocks = []
+        descriptor = {'rows': rows, 'columns': list(df.columns), 'blocks': [], 'categories': {}}
+
+        def new_block(dtype_str: str, columns: list) -> np.ndarray:
+            dtype = np.dtype(dtype_str)
+            shm = shared_memory.SharedMemory(create=True, size=max(dtype.itemsize * rows * len(columns), 1))
+            blocks.append(shm)
+            descriptor['blocks'].append({'shm': shm.name, 'dtype': dtype_str, 'columns': columns})
+            return np.ndarray((len(columns), rows), dtype=dtype, buffer=shm.buf)
+
+        for dtype_str, columns in groups.items():
+            arr = new_block(dtype_str, columns)
+            for pos, col in enumerate(columns):
+                arr[pos, :] = df[col].to_numpy()
+
+        if encoded:
+            arr = new_block(np.dtype(np.int32).str, encoded)
+            for pos, col in enumerate(encoded):
+                codes, uniques = pd.factorize(df[col])  # NaN -> код -1
+                arr[pos, :] = codes
+                descriptor['categories'][col] = list(uniques)
+            descriptor['blocks'][-1]['encoded'] = True
+
+        return cls(descriptor, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor: dict) -> 'SharedDrfoFrame':
+        """Підключення до блоків спільної пам'яті за дескриптором (у дочірньому процесі)"""
+        blocks = [shared_memory.SharedMemory(name=b['shm']) for b in descriptor['blocks']]
+        return cls(descriptor, blocks, owner=False)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Датафрейм (тільки читання) з текстовими колонками типу object - сумісний з кодом формування звітів"""
+        if self._df is None:
+            self._df = self.get_df()
+        return self._df
+
+    def get_df(self, categorical=False) -> pd.DataFrame:
+        """
+        Відновлення датафрейму (тільки читання). Числові колонки - представлення на спільну пам'ять без копіювання,
+        текстові колонки відновлюються зі словника одним take() по кодах.
+
+        :param categorical: текстові колонки як pd.Categorical над кодами у спільній пам'яті (без декодування)
+        """
+        rows = self.descriptor['rows']
+        parts = []
+        for shm, block in zip(self.blocks, self.descriptor['blocks']):
+            arr = np.ndarray((len(block['columns']), rows), dtype=np.dtype(block['dtype']), buffer=shm.buf)
+            arr.flags.writeable = False
+            if block.get('encoded') and categorical:
+                decoded = {col: pd.Categorical.from_codes(arr[pos], self.descriptor['categories'][col])
+                           for pos, col in enumerate(block['columns'])}
+                parts.append(pd.DataFrame(decoded, copy=False))
+            elif block.get('encoded'):
+                decoded = {}
+                for pos, col in enumerate(block['columns']):
+                    categories = np.empty(len(self.descriptor['categories'][col]) + 1, dtype=object)
+                    categories[:-1] = self.descriptor['categories'][col]
+                    categories[-1] = np.nan  # код -1 вказує на останній елемент - np.nan
+                    decoded[col] = categories.take(arr[pos])
+                parts.append(pd.DataFrame(decoded, copy=False))
+            else:
+                parts.append(pd.DataFrame(arr.T, columns=block['columns'], copy=False))
+        if parts:
+            df = pd.concat(parts, axis=1, copy=False)  # порядок колонок - за блоками (без перевпорядкування-копії)
+        else:
+            df = pd.DataFrame(columns=self.descriptor['columns'])
+        return df
+
+    def close(self):
+        """
+        Закриття доступу до спільної пам'яті поточним процесом.
+        Перед викликом мають бути видалені всі посилання на отримані датафрейми (представлення на спільну пам'ять).
+        """
+        self._df = None
+        for shm in self.blocks:
+            shm.close()
+
+    def release(self):
+        """Закриття та звільнення спільної пам'яті (викликається процесом-власником)"""
+        self.close()
+        if self.owner:
+            for shm in self.blocks:
+                shm.unlink()
+        self.blocks = []
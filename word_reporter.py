@@ -2,26 +2,30 @@
 Формування документу MS Word
 """
 import io
-import re
-from typing import List, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
 import numpy as np
 
 from docx import Document
 from docx.shared import Cm
+from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from docx.table import _Cell
-
-import matplotlib.pyplot as plt
-from matplotlib.pyplot import Figure
 
 from empty_docx import _DocEditorEmpty
+from docx_charts import add_bar_chart, add_pie_chart
+from docx_merge import append_document
+from docx_tables import add_table, merge_spans
+from shared_frame import SharedDrfoFrame
+from amount_format import f2s, format_amounts, k2s
+from code_labels import labels_long, labels_short
+from company_titles import company_title
+from periods import quarter_ordinal, split_ordinal, work_periods
 from xml_converter import FileProfitXML, MultiFileDrfoData
-from defines import dict_long, dict_short, service_col_names, headersdict, dict_company_types
+from defines import dict_long, dict_short, service_col_names, headersdict
 
 
 class DocEditor(_DocEditorEmpty):
@@ -35,35 +39,205 @@ class DocEditor(_DocEditorEmpty):
                  add_signs=False,
                  add_tab=False,
                  sub_list_text=None,
-                 sub_list_table=None):
+                 sub_list_table=None,
+                 chart_backend='matplotlib'):
+        """
+        :param chart_backend: формування графіків - 'matplotlib' (зображення PNG) або 'native' (вбудовані графіки
+                              MS Word з даними, редагуються у MS Word; matplotlib не використовується)
+        """
+        assert chart_backend in ('matplotlib', 'native'), f'Невідомий тип графіків: {chart_backend}'
         super().__init__()
         self.add_years = add_years
         self.add_signs = add_signs
         self.add_tab = add_tab
         self.sub_list_text = sub_list_text
         self.sub_list_table = sub_list_table
+        self.chart_backend = chart_backend
+        self.charts = None  # графіки PNG (фігури використовуються повторно для всіх осіб)
+        if chart_backend == 'matplotlib':
+            from charts import ChartRenderer  # matplotlib імпортується лише для графіків PNG
+            self.charts = ChartRenderer()
 
         assert issubclass(xml_inst.__class__, FileProfitXML) or isinstance(xml_inst, pd.DataFrame)
         self.df_xml = xml_inst.df.copy() if issubclass(xml_inst.__class__, FileProfitXML) else xml_inst.copy()
         self.df_xml.rename(columns=service_col_names, inplace=True)  # назви колонок до більш зручних у коді
 
-        # Формування додаткової колонки для сортування з урахуванням кварталу:
-        def create_quad_col(row):
-            return int(row['year']) * 10 + int(row['quad'])
-
-        self.df_xml['year_quad'] = self.df_xml.apply(lambda row: create_quad_col(row), axis=1)
+        # Порядковий номер кварталу (формується у fill_df, для записів без колонки - розраховується):
+        if 'qord' not in self.df_xml.columns:
+            self.df_xml['qord'] = quarter_ordinal(self.df_xml['year'], self.df_xml['quad'])
 
         # Визначення переліку осіб щодо яких наявні записи у завантаженому XML:
         self.persons = [x for x in self.df_xml['person'].dropna().unique().tolist() if len(x) > 6]
 
+        # Суми за всіма записами (особа - рік - квартал - ознака - агент), з яких розраховуються показники частин
+        # документа, та позиції записів кожної особи:
+        self.cube: pd.DataFrame = self.df_xml.groupby(['person', 'year', 'quad', 'desc', 'employer_id'],
+                                                      dropna=False)[['income', 'tax', 'profit']].sum()
+        self._person_rows = self.df_xml.groupby('person').indices
+
+        # Періоди роботи щодо кожного працедавця всіх осіб - {особа: {код_працедавця: '1.2020 - 4.2020, 2.2021'}}:
+        periods = work_periods(self.df_xml, ['person', 'employer_id'])
+        self.work_periods = {person: group.droplevel(0).to_dict() for person, group in periods.groupby(level=0)}
+
     def get_available_persons(self) -> List[str]:
         return self.persons
 
+    def person_frame(self, person: str) -> pd.DataFrame:
+        """Записи щодо особи (копія, порядок записів - як у завантажених даних)"""
+        return self.df_xml.iloc[self._person_rows[person]].copy()
+
+    def save_docx(self, file_path):
+        """Збереження документу у файл MS Word (фігури графіків звільняються)"""
+        if self.charts is not None:
+            self.charts.close()
+        return super().save_docx(file_path)
+
     def write_person_to_document(self, person: str):
         DocPartPerson(self, person,
                       add_years=self.add_years, add_signs=self.add_signs, add_tab=self.add_tab,
                       sub_list_text=self.sub_list_text, sub_list_table=self.sub_list_table)
 
+    def chart_jobs(self, persons: Optional[List[str]] = None) -> List[Tuple[str, dict]]:
+        """
+        Вхідні дані всіх графіків звіту щодо осіб - (тип графіка, {аргументи ChartRenderer.bar_chart / pie_chart}),
+        розраховуються з сум self.cube (без формування частин документа)
+        """
+        persons = self.persons if persons is None else persons
+        if not (self.add_years or self.add_signs):
+            return []
+        qord_range = self.df_xml.groupby('person')['qord'].agg(['min', 'max'])
+        jobs = []
+        for person in persons:
+            jobs.extend(DocPartPerson.chart_args(self.cube.loc[person],
+                                                 int(qord_range.at[person, 'min']), int(qord_range.at[person, 'max']),
+                                                 add_years=self.add_years, add_signs=self.add_signs))
+        return jobs
+
+    def write_persons_prerendered(self, persons: Optional[List[str]] = None, workers: Optional[int] = None,
+                                  progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        Послідовне формування частин документа щодо осіб з попереднім формуванням графіків у пулі процесів:
+        вхідні дані графіків всіх осіб розраховуються заздалегідь, графіки формуються у пулі одночасно з
+        формуванням документа (частина документа очікує лише свої графіки)
+
+        :param persons: перелік осіб (None - всі наявні особи)
+        :param workers: кількість процесів формування графіків (None - за кількістю ядер)
+        :param progress_callback: функція відображення прогресу (додано осіб, всього)
+        """
+        persons = self.persons if persons is None else persons
+        total = len(persons)
+        if self.charts is None:  # вбудовані графіки MS Word формуються під час запису документа
+            return self.write_persons_parallel(persons, workers=1, progress_callback=progress_callback)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            self.charts.prerender(executor, self.chart_jobs(persons))
+            for pos, person in enumerate(persons):
+                self.write_person_to_document(person)
+                if progress_callback is not None:
+                    progress_callback(pos + 1, total)
+
+    def render_person_docx(self, person: str) -> bytes:
+        """Формування окремого документа щодо особи (поточний документ інстансу замінюється новим)"""
+        self.new_document()
+        self.write_person_to_document(person)
+        memory_file = io.BytesIO()
+        self.document.save(memory_file)
+        return memory_file.getvalue()
+
+    def write_persons_parallel(self, persons: Optional[List[str]] = None, workers: Optional[int] = None,
+                               progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        Формування частин документа щодо осіб у пулі процесів (кожна особа - окремий документ у дочірньому
+        процесі) та послідовне об'єднання частин у поточний документ у порядку переліку осіб
+
+        :param persons: перелік осіб (None - всі наявні особи)
+        :param workers: кількість процесів (None - за кількістю ядер, 1 - послідовно без паралельності)
+        :param progress_callback: функція відображення прогресу (додано осіб, всього)
+        """
+        persons = self.persons if persons is None else persons
+        total = len(persons)
+        if workers == 1 or total < 2:
+            for pos, person in enumerate(persons):
+                self.write_person_to_document(person)
+                if progress_callback is not None:
+                    progress_callback(pos + 1, total)
+            return
+
+        with self._worker_pool(workers) as executor:
+            futures = [executor.submit(_render_person, person) for person in persons]
+            for pos, future in enumerate(futures):  # об'єднання у порядку осіб (решта частин формується)
+                append_document(self.document, Document(io.BytesIO(future.result())))
+                if progress_callback is not None:
+                    progress_callback(pos + 1, total)
+
+    def write_persons_file(self, file: Union[str, Path], persons: List[str]):
+        """Формування та збереження окремого файлу щодо переліку осіб (поточний документ інстансу замінюється новим)"""
+        self.new_document()
+        for person in persons:
+            self.write_person_to_document(person)
+        self.document.save(Path(file))
+
+    def save_docx_split(self, directory: Union[str, Path], prefix='report', volume_size=1,
+                        persons: Optional[List[str]] = None, workers: Optional[int] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None) -> Path:
+        """
+        Збереження звіту окремими файлами, що формуються у пулі процесів: файл щодо кожної особи
+        (<prefix>_<РНОКПП>.docx) або томи по volume_size осіб (<prefix>_001.docx, <prefix>_002.docx...).
+        Перелік створених файлів та осіб у кожному файлі записується у <prefix>_manifest.csv.
+
+        :param directory: каталог для збереження файлів
+        :param prefix: початок назви файлів
+        :param volume_size: кількість осіб у одному файлі (1 - окремий файл щодо кожної особи)
+        :param persons: перелік осіб (None - всі наявні особи)
+        :param workers: кількість процесів (None - за кількістю ядер, 1 - послідовно без паралельності)
+        :param progress_callback: функція відображення прогресу (записано файлів, всього)
+        :return: шлях до файлу переліку (manifest)
+        """
+        assert volume_size > 0, "Кількість осіб у файлі має бути більше 0"
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        persons = self.persons if persons is None else persons
+        if volume_size == 1:
+            parts = [(directory / f'{prefix}_{person}.docx', [person]) for person in persons]
+        else:
+            volumes = [persons[start:start + volume_size] for start in range(0, len(persons), volume_size)]
+            parts = [(directory / f'{prefix}_{num:03d}.docx', volume) for num, volume in enumerate(volumes, 1)]
+
+        total = len(parts)
+        if workers == 1 or total < 2:
+            for pos, (file, part_persons) in enumerate(parts):
+                self.write_persons_file(file, part_persons)
+                if progress_callback is not None:
+                    progress_callback(pos + 1, total)
+        else:
+            with self._worker_pool(workers) as executor:
+                futures = [executor.submit(_write_persons_file, file, part_persons) for file, part_persons in parts]
+                for done, future in enumerate(as_completed(futures)):
+                    future.result()  # передача винятків дочірнього процесу
+                    if progress_callback is not None:
+                        progress_callback(done + 1, total)
+
+        manifest = pd.DataFrame({'Файл': [file.name for file, _ in parts],
+                                 'Осіб': [len(part_persons) for _, part_persons in parts],
+                                 'РНОКПП': [', '.join(part_persons) for _, part_persons in parts]})
+        manifest_file = directory / f'{prefix}_manifest.csv'
+        manifest.to_csv(manifest_file, index=False, encoding='utf-8')
+        return manifest_file
+
+    @contextmanager
+    def _worker_pool(self, workers: Optional[int]) -> Iterator[ProcessPoolExecutor]:
+        """Пул процесів формування частин звіту (записи передаються через спільну пам'ять)"""
+        options = dict(add_years=self.add_years, add_signs=self.add_signs, add_tab=self.add_tab,
+                       sub_list_text=self.sub_list_text, sub_list_table=self.sub_list_table,
+                       chart_backend=self.chart_backend)
+        shared = SharedDrfoFrame.from_df(self.df_xml)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_person_worker,
+                                     initargs=(shared.descriptor, options)) as executor:
+                yield executor
+        finally:
+            shared.release()
+
 
 class DocPartPerson:
     """
@@ -81,38 +255,33 @@ class DocPartPerson:
                  sub_list_text=None,
                  sub_list_table=None):
         # Налаштування та початкові значення
+        self.add_years = add_years
+        self.add_signs = add_signs
         self.sub_list_text = sub_list_text
         self.sub_list_table = sub_list_table
         self.editor: DocEditor = editor  # посилання на інстанс даних з яких формується документ
         self.document: Document = editor.document  # посилання на інстанс документа
         self.person = person  # код досліджуваної особи
         self.sources_periods_dict = {}  # {код_працедавця: [квартали, ]}
-        self.df: pd.DataFrame = editor.df_xml.loc[editor.df_xml['person'] == person].copy()
+        self.df: pd.DataFrame = editor.person_frame(person)
+        self.cube: pd.DataFrame = editor.cube.loc[person]  # суми особи: рік - квартал - ознака - агент
         self.sources_list = self.df['employer_id'].dropna().unique().tolist()  # список працедавців
 
         # Періоди роботи щодо кожного працедавця:
         self.sources_periods_dict = self.gather_kvartals_from_source()
 
-        # Підрахунок періоду перевірки (розрахунок кварталів)
-        self.min_quad = self.df['year_quad'].min()
-        self.max_quad = self.df['year_quad'].max()
-        self.min_year = self.df['year'].min()
-        self.max_year = self.df['year'].max()
+        # Підрахунок періоду перевірки (порядкові номери першого та останнього кварталів)
+        self.min_qord = int(self.df['qord'].min())
+        self.max_qord = int(self.df['qord'].max())
+        self.min_year, self.min_quad = split_ordinal(self.min_qord)
+        self.max_year, self.max_quad = split_ordinal(self.max_qord)
         assert self.max_year >= self.min_year
 
         # Визначення тривалості періоду за який наявні дані (щодо опрацьованої особи):
-        min_quad_val = int(str(self.min_quad)[-1])
-        max_quad_val = int(str(self.max_quad)[-1])
-        max_year_val = int(self.max_year)
-        min_year_val = int(self.min_year)
-        if self.min_year == self.max_year:
-            self.dur_month = max_quad_val - min_quad_val + 1
-        else:
-            self.dur_month = (5 - min_quad_val) + max_quad_val + ((max_year_val - min_year_val - 1) * 4)
-        self.dur_month = self.dur_month * 3  # квартали в місяці
+        self.dur_month = (self.max_qord - self.min_qord + 1) * 3  # квартали в місяці
 
         # Визначення середніх значень доходів (розраховується з прибутку):
-        self.profit_ave_month = round(self.df['profit'].sum() / self.dur_month, 2)
+        self.profit_ave_month = round(self.cube['profit'].sum() / self.dur_month, 2)
         self.profit_ave_year = round(self.profit_ave_month * 12, 2)
 
         # Тестове представлення тривалості у місяцях (для використання у документі):
@@ -125,18 +294,12 @@ class DocPartPerson:
         self.quad_count = self.dur_month // 3
 
         # Словник відповідності: код ЄДРПОУ = назва юридичної особи
-        sources_list = self.df['employer_id'].dropna().unique().tolist()
-        self.sources_dict = {}
-        for s in sources_list:
-            name = self.df.loc[self.df['employer_id'] == s]['employer_name'].unique().tolist()[0]
-            self.sources_dict.update({s: name})
-
-        self.quad_dict = {}
-        self.years_dict = {}
+        sources = self.df.dropna(subset=['employer_id']).drop_duplicates('employer_id')  # перша назва агента
+        self.sources_dict = dict(zip(sources['employer_id'].tolist(), sources['employer_name'].tolist()))
 
         # Розрахунок статистики для відображення графіків
-        self._count_plot_data_by_quarts()
-        self._count_plot_data_by_years()
+        self.quad_dict = self._plot_data_by_quarts(self.cube, self.min_qord, self.max_qord)
+        self.years_dict = self._plot_data_by_years(self.cube)
 
         # Заповнення документа:
         self._add_title()
@@ -154,53 +317,38 @@ class DocPartPerson:
         self.document.add_page_break()
 
     @staticmethod
-    def get_cells_grid(table):
-        cells = [[]]
-        col_count = table._column_count
-        for tc in table._tbl.iter_tcs():
-            cells[-1].append(_Cell(tc, table))
-            if len(cells[-1]) == col_count:
-                cells.append([])
-        return cells
+    def _plot_data_by_years(cube: pd.DataFrame) -> dict:
+        """Підготовка даних для гістограми - доходи по роках (з сум особи)"""
+        years_dict = {}
+        by_year = cube.groupby(level='year').sum()
+        for pos, (year, y_profit, y_income, y_tax) in enumerate(zip(by_year.index.tolist(),
+                                                                   by_year['profit'].tolist(),
+                                                                   by_year['income'].tolist(),
+                                                                   by_year['tax'].tolist())):
+            years_dict.update({pos: [None, None, str(year), round(y_profit, 2), round(y_income, 2),
+                                     round(y_tax, 2)]})
+        return years_dict
 
-    def _count_plot_data_by_years(self):
-        """Підготовка даних для гістограми - доходи по роках"""
-        for pos, year in enumerate(sorted(self.df['year'].dropna().unique().tolist())):
-            y_profit = round(self.df.loc[self.df['year'] == year]['profit'].sum(), 2)
-            y_income = round(self.df.loc[self.df['year'] == year]['income'].sum(), 2)
-            y_tax = round(self.df.loc[self.df['year'] == year]['tax'].sum(), 2)
-            self.years_dict.update({pos: [None, None, str(year), y_profit, y_income, y_tax]})
-
-    def _count_plot_data_by_quarts(self):
-        """Підготовка даних для гістограми - доходи по кварталам"""
-        cur_year = int(self.min_year)
-        cur_quad = int(str(self.min_quad)[-1])
-        df = self.df
-        for q_order in range(self.quad_count):
+    @staticmethod
+    def _plot_data_by_quarts(cube: pd.DataFrame, min_qord: int, max_qord: int) -> dict:
+        """Підготовка даних для гістограми - доходи по кварталам (з сум особи, квартали min_qord - max_qord)"""
+        quad_dict = {}
+        by_quad = cube.groupby(level=['year', 'quad']).sum().to_dict('index')  # {(рік, квартал): суми}
+        empty = {'profit': 0.0, 'income': 0.0, 'tax': 0.0}
+        for q_order, qord in enumerate(range(min_qord, max_qord + 1)):
+            cur_year, cur_quad = split_ordinal(qord)
             q_desc = f'{cur_year} ({cur_quad}кв.)'
-            q_profit = round(df.loc[(df['year'] == cur_year) & (df['quad'] == cur_quad)]['profit'].sum(), 2)
-            q_income = round(df.loc[(df['year'] == cur_year) & (df['quad'] == cur_quad)]['income'].sum(), 2)
-            q_tax = round(df.loc[(df['year'] == cur_year) & (df['quad'] == cur_quad)]['tax'].sum(), 2)
-            self.quad_dict.update({q_order: [cur_year, cur_quad, q_desc, q_profit, q_income, q_tax]})
-            cur_quad += 1
-            if cur_quad == 5:
-                cur_year += 1
-                cur_quad = 1
+            sums = by_quad.get((cur_year, cur_quad), empty)
+            q_profit = round(sums['profit'], 2)
+            q_income = round(sums['income'], 2)
+            q_tax = round(sums['tax'], 2)
+            quad_dict.update({q_order: [cur_year, cur_quad, q_desc, q_profit, q_income, q_tax]})
+        return quad_dict
 
     @staticmethod
     def f2s(amount: float):
         """Перетворення float у рядок string формату 1 200 000.00 (для відображення у документах)"""
-        try:
-            thou_sep = ' '
-            deci_sep = '.'
-            w_dec = '%.2f' % amount
-            part_int = w_dec.split('.')[0]
-            part_int = re.sub(r"\B(?=(?:\d{3})+$)", thou_sep, part_int)
-            part_dec = w_dec.split('.')[1]
-            return part_int + deci_sep + part_dec
-        except Exception:
-            print(f'Error with float value {amount} (type {type(amount)}) - cant convert to string')
-            return 'n/a'
+        return f2s(amount, error_value='n/a')
 
     def _add_title(self):
         """Друк заголовку документа"""
@@ -211,19 +359,14 @@ class DocPartPerson:
     def df_format(df, headers):
         """Форматування датафрейму для відображення у документі"""
         df = df[headers].copy()
-
-        def f2s_wrap(val):
-            return DocPartPerson.f2s(val)
-
-        df['income'] = df['income'].apply(lambda x: f2s_wrap(x))
-        df['tax'] = df['tax'].apply(lambda x: f2s_wrap(x))
-        # df['profit'] = df['profit'].apply(lambda x: f2s_wrap(x))
+        df['income'] = format_amounts(df['income'].to_numpy(), error_value='n/a')
+        df['tax'] = format_amounts(df['tax'].to_numpy(), error_value='n/a')
 
         # Зменшення кількості колонок:
         df['year'] = df['year'].astype(str) + ' (' + df['quad'].astype(str) + 'кв.)'
         df['employer_name'] = df['employer_name'].astype(str) + ' (код ' + df['employer_id'].astype(str) + ')'
         df = df[['year', 'employer_name', 'income', 'tax', 'desc']]
-        df.replace({'desc': dict_long}, inplace=True)
+        df['desc'] = labels_long.map(df['desc'].to_numpy())
         df.rename(columns=headersdict, inplace=True)
         df.fillna('Не зазначено', inplace=True)
         return df
@@ -233,11 +376,11 @@ class DocPartPerson:
         p_points_intro = self.document.add_paragraph(style='text_base')
         p_points_intro.add_run(
             f"Опрацюванням відомостей витягу Державного реєстру фізичних осіб - платників податків про суми доходів "
-            f"та нарахованих податків (платник ______, РНОКПП {self.person}) за період {str(self.min_quad)[-1]}кв. "
-            f"{self.min_year} року - {str(self.max_quad)[-1]}кв. {self.max_year} року (загальний період "
-            f"{self.dur_text}) встановлено отримання доходів на суму {self.f2s(self.df['income'].sum())} грн., "
-            f"утримано податків на суму {self.f2s(self.df['tax'].sum())} грн.")
-        p_points_intro.add_run(f" (прибуток складає {self.f2s(self.df['profit'].sum())} грн.):").bold = True
+            f"та нарахованих податків (платник ______, РНОКПП {self.person}) за період {self.min_quad}кв. "
+            f"{self.min_year} року - {self.max_quad}кв. {self.max_year} року (загальний період "
+            f"{self.dur_text}) встановлено отримання доходів на суму {self.f2s(self.cube['income'].sum())} грн., "
+            f"утримано податків на суму {self.f2s(self.cube['tax'].sum())} грн.")
+        p_points_intro.add_run(f" (прибуток складає {self.f2s(self.cube['profit'].sum())} грн.):").bold = True
 
         p_average_y = self.document.add_paragraph(style='List Bullet 2')
         p_average_y.add_run(f"в середньому на рік - ")
@@ -248,62 +391,58 @@ class DocPartPerson:
         p_average_m.add_run(f'{self.f2s(self.profit_ave_month)} грн.').bold = True
         p_dummy = self.document.add_paragraph('', style='text_base')
 
+    @classmethod
+    def chart_args(cls, cube: pd.DataFrame, min_qord: int, max_qord: int,
+                   add_years=False, add_signs=False) -> List[Tuple[str, dict]]:
+        """
+        Вхідні дані графіків частини документа щодо особи - (тип графіка, {аргументи ChartRenderer.bar_chart /
+        pie_chart}), такі самі, як під час формування частини документа
+
+        :param cube: суми особи (рік - квартал - ознака - агент)
+        :param min_qord: порядковий номер першого кварталу періоду
+        :param max_qord: порядковий номер останнього кварталу періоду
+        """
+        jobs = []
+        if add_years:
+            if (max_qord - min_qord + 1) * 3 > 36:
+                plot_data = cls._plot_data_by_years(cube)
+            else:
+                plot_data = cls._plot_data_by_quarts(cube, min_qord, max_qord)
+            jobs.append(('bar', cls._plot_args(plot_data)))
+        if add_signs:
+            signs_rating_pie = cls._signs_pie_series(cube)
+            if len(signs_rating_pie) > 1:
+                order, desc, vals = cls._pie_data(signs_rating_pie)
+                jobs.append(('pie', dict(vals=vals, labels=desc)))
+        return jobs
+
+    def _plot_data(self) -> dict:
+        """Дані гістограми: з річною деталізацією, якщо даних багато, інакше - з поквартальною"""
+        return self.years_dict if self.dur_month > 36 else self.quad_dict
+
+    @staticmethod
+    def _plot_args(input_data: dict) -> dict:
+        """Аргументи гістограми зі словника даних по роках / кварталах"""
+        values = list(input_data.values())  # [рік, квартал, заголовок, прибуток, дохід, податок]
+        return dict(columns=[v[2] for v in values],
+                    profit=[v[3] for v in values],
+                    tax=[v[5] for v in values],
+                    income=[v[4] for v in values])
+
     def _add_plot(self, input_data: dict):
         """Графік загального прибутку по роках / кварталах"""
-        columns = []  # квартал, рік...
-        data = []  # двомірний масив ([[рік, квартал, заголовок, сума, сума сума],[рядок...],...)
-        for i, v in input_data.items():
-            v: list
-            data.append([v[3], v[5], v[4]])
-            columns.append(v[2])
-
-        data_np = np.array(data).transpose()
-        rows = ["Дохід", "Податок", 'Прибуток']
-        n_rows = len(data_np)
-
-        values = np.linspace(0, int(np.amax(data_np)), 5)  # положення підписів осі y
-        values_lbl = np.linspace(0, int(np.amax(data_np)) // 1000, 5)  # підписи осі y
-
-        colors = plt.cm.BuPu(np.linspace(0, 0.5, len(rows)))
-        index = np.linspace(0.5, len(columns) - 0.5, len(columns))  # положення барів по осі х
-        bar_width = 0.5
-
-        cell_text = []  # значення для заповнення таблички під графіком
-        for row in range(n_rows):
-            cell_text.append(['%d' % (x / 1000.0) for x in data_np[row]])
-        cell_text.reverse()
-
-        fig, ax = plt.subplots()
-        fig: Figure
-        fig.set_dpi(100)
-        fig.set_size_inches(10, 3.5, forward=True)
-        ax.set_xlim(0, len(columns))
-
-        plt.style.use('seaborn-whitegrid')
-        plt.bar(index, data_np[2], bar_width, color=colors[2], edgecolor='black')
-        plt.bar(index, data_np[0], bar_width, color=colors[1], edgecolor='black')
-
-        the_table = plt.table(cellText=cell_text,
-                              rowLabels=rows,
-                              colLabels=columns,
-                              loc='bottom')
-        the_table.scale(1, 2)
-
-        plt.ylabel("Тисяч грн.")
-        plt.yticks(values, ['%d' % val for val in values_lbl])
-        plt.xticks([])
-        plt.subplots_adjust(bottom=0.3)
-        ax.margins(x=0.0, y=0.05)
-        # plt.title('Дохід поквартально')
-
-        memory_file = io.BytesIO()
-        plt.savefig(memory_file)
+        plot_args = self._plot_args(input_data)
         p_plot_timeline = self.document.add_paragraph(style='central_header')
-        p_plot_timeline.add_run().add_picture(memory_file, width=Cm(17))
+        if self.editor.chart_backend == 'native':
+            add_bar_chart(self.document, p_plot_timeline.add_run(), **plot_args, width=Cm(17), height=Cm(7.5))
+        else:
+            png = self.editor.charts.bar_chart(**plot_args)
+            p_plot_timeline.add_run().add_picture(io.BytesIO(png), width=Cm(17))
         self.document.add_paragraph(style='text_base')
 
-    def _add_pie(self, data_ser: pd.Series, percent_limit=5, hide_labels=False):
-        # Групування малозначних записів у рядок "Інші":
+    @staticmethod
+    def _pie_data(data_ser: pd.Series, percent_limit=5):
+        """Номери, назви та суми секторів кругового графіку (малозначні записи групуються у рядок "Інші")"""
         all_amount = data_ser.sum()
         limit = (all_amount / 100) * percent_limit
         rate_show = data_ser.loc[data_ser >= limit]
@@ -311,71 +450,29 @@ class DocPartPerson:
         hide_sum = rate_hide.sum()
         rate = pd.concat([rate_show, pd.Series(index=['Інші'], data=[hide_sum])])
 
-        # Основні масиви для побудови кругового графіку:
         order = [str(f'№{int(x)}') for x in list(np.linspace(1, len(rate), len(rate)))]
         desc = list(rate.index)
         vals = rate.to_list()
-        vals_lbl = [re.sub(r"\B(?=(?:\d{3})+$)", ' ', str(int(x/1000))) for x in vals]  # у вигляді тис. з розділювачем
-
-        plt.style.use('seaborn-whitegrid')
-        fig, ax = plt.subplots()
-        fig: Figure
-        fig.set_dpi(100)
-        fig.set_size_inches(14, 6)
-        ax.margins(x=0.0, y=0.05)
+        return order, desc, vals
 
+    def _add_pie(self, data_ser: pd.Series, percent_limit=5, hide_labels=False):
+        order, desc, vals = self._pie_data(data_ser, percent_limit)
         pie_labels = order if hide_labels else desc
-        patches, texts, autotexts = ax.pie(vals,
-                                           labels=pie_labels,
-                                           autopct='%1.0f%%',
-                                           shadow=True,
-                                           # colors=colors,
-                                           startangle=90,
-                                           frame=False,
-                                           radius=1.1,
-                                           wedgeprops={"edgecolor": "k", 'linewidth': 0.8},
-                                           labeldistance=1.2,
-                                           explode=[0.05] * len(vals))
-        for t in texts:
-            t.set_fontsize(24)
-        for t in autotexts:
-            t.set_fontsize(24)
-
-        memory_file = io.BytesIO()
-        plt.savefig(memory_file)
         p_plot_pie = self.document.add_paragraph(style='central_header')
-        p_plot_pie.add_run().add_picture(memory_file, width=Cm(14))
+        if self.editor.chart_backend == 'native':
+            add_pie_chart(self.document, p_plot_pie.add_run(), vals, pie_labels, width=Cm(15), height=Cm(7))
+        else:
+            png = self.editor.charts.pie_chart(vals, pie_labels)
+            p_plot_pie.add_run().add_picture(io.BytesIO(png), width=Cm(14))
         self.document.add_paragraph(style='text_base')
 
-        # Додати графічну таблицю з легендою графіку:
-        fig, ax = plt.subplots()
-        fig: Figure
-        fig.set_dpi(100)
-        fig.set_size_inches(8, 0.3*len(vals_lbl))
-        plt.xticks([])
-        plt.yticks([])
-        ax.set_frame_on(False)
-        col_labels = ["Вид доходу", "Тис.грн."]
-        cell_text = []
-        for row in range(len(rate)):
-            cell_text.append([desc[row], vals_lbl[row]])
-
-        table = plt.table(cellText=cell_text,
-                          rowLabels=order,
-                          colLabels=col_labels,
-                          loc='center',
-                          colWidths=[0.9, 0.3],
-                          cellLoc='center')
-        table.auto_set_font_size(False)
-        table.set_fontsize(14)
-        table.scale(1, 1.3)
-        # plt.subplots_adjust(bottom=0.3)
-        ax.margins(x=0.0, y=0.05)
-
-        memory_file = io.BytesIO()
-        plt.savefig(memory_file)
-        p_plot_pie_table = self.document.add_paragraph(style='central_header')
-        p_plot_pie_table.add_run().add_picture(memory_file, width=Cm(12))
+        # Таблиця з легендою графіку:
+        legend = add_table(self.document, ['№', 'Вид доходу', 'Тис.грн.'],
+                           [[order[pos], desc[pos], k2s(vals[pos])] for pos in range(len(vals))],
+                           widths=(Cm(1.5), Cm(8), Cm(2.5)),
+                           alignments=(WD_PARAGRAPH_ALIGNMENT.CENTER, WD_PARAGRAPH_ALIGNMENT.LEFT,
+                                       WD_PARAGRAPH_ALIGNMENT.RIGHT))
+        legend.alignment = WD_TABLE_ALIGNMENT.CENTER
         self.document.add_paragraph(style='text_base')
 
     def _add_profit_sources(self):
@@ -384,7 +481,7 @@ class DocPartPerson:
         p_sources = self.document.add_paragraph('', style='text_base')
         p_sources.add_run('Джерела доходів:').bold = True
 
-        employer_rating = self.df.groupby('employer_id')['income'].sum()
+        employer_rating = self.cube.groupby(level='employer_id')['income'].sum()
         employer_rating = employer_rating.sort_values(ascending=False)
         emp_df = self._prep_emp_df(employer_rating)
 
@@ -392,67 +489,19 @@ class DocPartPerson:
         self.document.add_paragraph('', style='text_base')
 
     def gather_kvartals_from_source(self):
-        """Формування списку кварталів щодо окремого працедавця"""
-        periods_temp = {} # [20231,]
-        for e in self.sources_list:
-            kvarts = list(set(self.df.loc[self.df['employer_id'] == e]['year_quad'].dropna().tolist()))
-            kvarts = sorted(kvarts)
-            periods_temp.update({e: kvarts})
-
-        periods_sep = {}  # [[2023, 1], ]
-        for e, vals in periods_temp.items():
-            vals = sorted(vals)
-            kvarts = []
-            for k_int in vals:
-                if len(str(k_int)) == 5:
-                    y = str(k_int)[:4]
-                    k = str(k_int)[-1]
-                    kvarts.append([y, k])
-            periods_sep.update({e: kvarts})
-
-        res = {}
-        for e, periods in periods_sep.items():
-            periods_res = []
-            limit = len(periods) - 1
-            cur_y_starts = int(periods[0][0])
-            cur_k_starts = int(periods[0][1])
-            last_k = int(periods[0][1])
-            last_y = int(periods[0][0])
-
-            for pos, kvart in enumerate(periods):
-                k = int(kvart[1])
-                y = int(kvart[0])
-
-                if (cur_y_starts == y and cur_k_starts == k) or \
-                        (last_y == y and (k - last_k == 1)) or \
-                        (y - last_y == 1 and last_k == 4 and k == 1):
-                    if pos == limit:
-                        if cur_y_starts == y and cur_k_starts == k:
-                            periods_res.append(f'{k}.{y}')
-                        else:
-                            periods_res.append(f'{cur_k_starts}.{cur_y_starts} - {k}.{y}')
-                        break
-                    last_y = y
-                    last_k = k
-                    continue
-
-                else:
-                    if cur_y_starts == last_y and cur_k_starts == last_k:
-                        periods_res.append(f'{last_k}.{last_y}')
-                        cur_y_starts = y
-                        cur_k_starts = k
-                    else:
-                        periods_res.append(f'{cur_k_starts}.{cur_y_starts} - {last_k}.{last_y}')
-                        cur_y_starts = y
-                        cur_k_starts = k
-
-                last_y = y
-                last_k = k
-
-            string_res = ", ".join(periods_res)
-            res.update({e: string_res})
-
-        return res
+        """Періоди роботи щодо кожного працедавця особи (розраховані для всіх осіб у DocEditor)"""
+        return self.editor.work_periods.get(self.person, {})
+
+    @staticmethod
+    def _signs_pie_series(cube: pd.DataFrame) -> pd.Series:
+        """Суми доходів за скороченими назвами ознак (дані кругового графіку)"""
+        signs_rating = cube.groupby(level='desc')['income'].sum()
+        return signs_rating.groupby(labels_short.map(signs_rating.index.to_numpy())).sum()
+
+    def _employers_income(self, level: str) -> Dict[object, pd.Series]:
+        """Суми доходу за агентами в межах кожного значення рівня level (рік, ознака) - {значення: суми}"""
+        by_employer = self.cube.groupby(level=[level, 'employer_id'])['income'].sum()
+        return {key: group.droplevel(0) for key, group in by_employer.groupby(level=0)}
 
     def _add_profit_signs(self):
         """Деталізація по видам доходів"""
@@ -460,12 +509,12 @@ class DocPartPerson:
         p_signs = self.document.add_paragraph('', style='text_base')
         p_signs.add_run('Ознаки (види) доходів:').bold = True
 
-        signs_rating = self.df.groupby('desc')['income'].sum()
+        signs_rating = self.cube.groupby(level='desc')['income'].sum()
         signs_rating = signs_rating.sort_values(ascending=False)
+        sign_employers = self._employers_income('desc')
+        no_employers = pd.Series(dtype=float)
 
-        df_short = self.df[['desc', 'income']].copy()
-        df_short.replace({'desc': dict_short}, inplace=True)
-        signs_rating_pie = df_short.groupby('desc')['income'].sum()
+        signs_rating_pie = self._signs_pie_series(self.cube)
         if len(signs_rating_pie) > 1:
             self._add_pie(signs_rating_pie)
 
@@ -473,8 +522,7 @@ class DocPartPerson:
             s_p = self.document.add_paragraph(f"{self.f2s(signs_rating[sign])} грн. - {dict_long.get(sign, sign)}",
                                               style='List Bullet')
             if self.sub_list_text:
-                df_sign = self.df.loc[self.df['desc'] == sign]
-                employers_in_sign = df_sign.groupby('employer_id')['income'].sum()
+                employers_in_sign = sign_employers.get(sign, no_employers)
                 employers_in_sign = employers_in_sign.sort_values(ascending=False)
                 if len(employers_in_sign) > 0:
                     s_p.add_run(':')
@@ -483,8 +531,7 @@ class DocPartPerson:
                                                     f"({self.sources_dict.get(cur_emp, 'назва не зазначається')})",
                                                     style='List Bullet 2')
             if self.sub_list_table:
-                df_sign = self.df.loc[self.df['desc'] == sign]
-                employers_in_sign = df_sign.groupby('employer_id')['income'].sum()
+                employers_in_sign = sign_employers.get(sign, no_employers)
                 employers_in_sign = employers_in_sign.sort_values(ascending=False)
                 if len(employers_in_sign) > 0:
                     s_p.add_run(':')
@@ -498,19 +545,17 @@ class DocPartPerson:
         p_years = self.document.add_paragraph('', style='text_base')
         p_years.add_run('Доходи по роках:').bold = True
 
-        if self.dur_month > 36:  # Графік з річною деталізацією, якщо даних багато
-            self._add_plot(self.years_dict)
-        else:  # Графік з поквартальною деталізацією, якщо даних небагато
-            self._add_plot(self.quad_dict)
+        self._add_plot(self._plot_data())
 
-        years_rating = self.df.groupby('year')['income'].sum()
+        years_rating = self.cube.groupby(level='year')['income'].sum()
         years_rating = years_rating.sort_index(ascending=False)
+        year_employers = self._employers_income('year')
+        no_employers = pd.Series(dtype=float)
         for year in list(years_rating.index):
             y_p = self.document.add_paragraph(f"{year} рік - {self.f2s(years_rating[year])} грн.", style='List Bullet')
 
             if self.sub_list_text:
-                df_year = self.df.loc[self.df['year'] == year]
-                year_emps = df_year.groupby('employer_id')['income'].sum()
+                year_emps = year_employers.get(year, no_employers)
                 if len(years_rating) > 0:
                     y_p.add_run(':')
                     year_emps = year_emps.sort_values(ascending=False)
@@ -519,8 +564,7 @@ class DocPartPerson:
                                                     f"({self.sources_dict.get(emp, 'назва не зазначається')})",
                                                     style='List Bullet 2')
             if self.sub_list_table:
-                df_year = self.df.loc[self.df['year'] == year]
-                year_emps = df_year.groupby('employer_id')['income'].sum()
+                year_emps = year_employers.get(year, no_employers)
                 year_emps = year_emps.sort_values(ascending=False)
                 if len(years_rating) > 0:
                     y_p.add_run(':')
@@ -538,44 +582,11 @@ class DocPartPerson:
         p_table_intro = self.document.add_paragraph(style='text_base')
         p_table_intro.add_run("Деталізована таблиця відомостей про отримані доходи: ")
 
-        # Створення таблиці та заповнення кольором заголовків:
-        tab = self.document.add_table(rows=df.shape[0] + 1, cols=len(df.columns))
-        tab.allow_autofit = False
-        tab.style = 'Table Grid'
-        headers = list(df.columns)
-        cells = self.get_cells_grid(tab)
-        for pos, header in enumerate(headers):
-            cells[0][pos].text = str(header)
-            cell_xml_element = cells[0][pos]._tc
-            table_cell_properties = cell_xml_element.get_or_add_tcPr()
-            shade_obj = OxmlElement('w:shd')
-            shade_obj.set(qn('w:fill'), 'd9d9d9')
-            table_cell_properties.append(shade_obj)
-
-        # Внесення даних у таблицю
-        for i in range(df.shape[0]):
-            for j in range(df.shape[1]):
-                cells[i+1][j].text = str(df.values[i, j])
-
-        # Центрування колонок
-        for i in range(df.shape[0]):
-            row_in_tab = i + 1
-            cells[row_in_tab][0].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            cells[row_in_tab][1].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-            cells[row_in_tab][2].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-            cells[row_in_tab][3].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-            cells[row_in_tab][4].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-        # Формат заголовків таблиці
-        for cell_pos in range(len(headers)):
-            tab.rows[0].cells[cell_pos].paragraphs[0].runs[0].font.bold = True
-            tab.rows[0].cells[cell_pos].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-
-        # Встановлення ширини колонок
-        widths = (Cm(2), Cm(5.5), Cm(2), Cm(2), Cm(5.5))
-        for i in range(df.shape[0]+1):
-            for idx, width in enumerate(widths):
-                cells[i][idx].width = width
+        # Таблиця формується одним проходом (заголовки, дані, вирівнювання, ширина колонок):
+        add_table(self.document, list(df.columns), df.values,
+                  widths=(Cm(2), Cm(5.5), Cm(2), Cm(2), Cm(5.5)),
+                  alignments=(WD_PARAGRAPH_ALIGNMENT.CENTER, WD_PARAGRAPH_ALIGNMENT.LEFT, WD_PARAGRAPH_ALIGNMENT.RIGHT,
+                              WD_PARAGRAPH_ALIGNMENT.RIGHT, WD_PARAGRAPH_ALIGNMENT.LEFT))
         self.document.add_paragraph(style='text_base')
 
     def _add_employer_table(self, df: pd.DataFrame):
@@ -585,42 +596,11 @@ class DocPartPerson:
         df: pd.DataFrame
         df.reset_index(inplace=True, drop=True)
 
-        # Створення таблиці та заповнення кольором заголовків:
-        tab = self.document.add_table(rows=df.shape[0] + 1, cols=len(df.columns))
-        tab.allow_autofit = False
-        tab.style = 'Table Grid'
-        headers = list(df.columns)
-        for pos, header in enumerate(headers):
-            tab.rows[0].cells[pos].text = str(header)
-            cell_xml_element = tab.rows[0].cells[pos]._tc
-            table_cell_properties = cell_xml_element.get_or_add_tcPr()
-            shade_obj = OxmlElement('w:shd')
-            shade_obj.set(qn('w:fill'), 'd9d9d9')
-            table_cell_properties.append(shade_obj)
-        cells = self.get_cells_grid(tab)
-
-        # Внесення даних у таблицю
-        for i in range(df.shape[0]):
-            for j in range(df.shape[1]):
-                cells[i+1][j].text = str(df.values[i, j])
-
-        # Центрування колонок
-        for row in range(len(tab.rows)):
-            cells[row][0].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-            cells[row][1].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            cells[row][2].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-            cells[row][3].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-        # Формат заголовків таблиці
-        for cell_pos in range(len(headers)):
-            cells[0][cell_pos].paragraphs[0].runs[0].font.bold = True
-            cells[0][cell_pos].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-
-        # Встановлення ширини колонок
-        widths = (Cm(2.5), Cm(2.5), Cm(9.0), Cm(3.0))
-        for i in range(df.shape[0]+1):
-            for idx, width in enumerate(widths):
-                cells[i][idx].width = width
+        # Таблиця формується одним проходом (заголовки, дані, вирівнювання, ширина колонок):
+        add_table(self.document, list(df.columns), df.values,
+                  widths=(Cm(2.5), Cm(2.5), Cm(9.0), Cm(3.0)),
+                  alignments=(WD_PARAGRAPH_ALIGNMENT.RIGHT, WD_PARAGRAPH_ALIGNMENT.CENTER, WD_PARAGRAPH_ALIGNMENT.LEFT,
+                              WD_PARAGRAPH_ALIGNMENT.LEFT))
         self.document.add_paragraph(style='text_base')
 
     def _prep_emp_df(self, employer_rating: pd.Series):
@@ -631,11 +611,8 @@ class DocPartPerson:
         emp_df = pd.DataFrame(data).transpose()
         emp_df.columns = ['Сума грн.', "Код агента", "Найменування"]
         emp_df.replace({'Найменування': self.sources_dict}, inplace=True)
-        emp_df['Найменування'] = emp_df['Найменування'].apply(lambda cell: self.company_title(cell))
-
-        def f2s_wrap(val):
-            return DocPartPerson.f2s(val)
-        emp_df['Сума грн.'] = emp_df['Сума грн.'].apply(lambda x: f2s_wrap(x))
+        emp_df['Найменування'] = emp_df['Найменування'].map(company_title)
+        emp_df['Сума грн.'] = format_amounts(emp_df['Сума грн.'].to_numpy(), error_value='n/a')
 
         emp_df['Період'] = emp_df['Код агента']
         emp_df.replace({'Період': self.sources_periods_dict}, inplace=True)
@@ -644,49 +621,32 @@ class DocPartPerson:
 
     def _pivot_tab_data(self):
         """Підготовка списку з даними для зведеної таблиці (клітинки, що мають злитись вертикально - порожні)"""
-        df = self.df.copy()
-        piv = pd.pivot_table(df,
-                             index=['year', 'desc', 'employer_id'],
-                             values=['profit'],
-                             aggfunc=np.sum)
-        indexes = list(piv.index)
+        # Суми рік - вид - агент та підсумки років і видів у межах року (групування сум особи, один прохід):
+        piv = self.cube.groupby(level=['year', 'desc', 'employer_id'])['profit'].sum()
+        year_totals = piv.groupby(level='year').sum().to_dict()
+        code_totals = piv.groupby(level=['year', 'desc']).sum().to_dict()
+
         cells = []
         last_y = None
         last_y_s = None
-        for turn in range(len(indexes)):
-            row = []
-            cur_y = str(indexes[turn][0])
-            cur_y_s = cur_y + str(indexes[turn][1])
+        for cur_y, code, employer in piv.index.tolist():
+            row = ['', '', '', '']  # рік, вид доходу, агент, сума за рік
             if cur_y != last_y:
-                row.append(cur_y)
-                row.append(self.f2s(piv.loc[int(cur_y), :, :].sum()))
-                # year_profit = re.sub(r"\B(?=(?:\d{3})+$)", ' ', str(int(piv.loc[int(cur_y), :, :].sum())//1000))
+                row[0] = str(cur_y)
+                row[3] = self.f2s(year_totals[cur_y])
                 last_y = cur_y
-            else:
-                row.append('')
-                row.append('')
-            if last_y_s != cur_y_s:
-                row.append(f'{dict_short.get(indexes[turn][1], "Вид відсутній у довідниках")} (код {indexes[turn][1]})'
-                           f' -   {"%.2f" % float(piv.loc[int(cur_y), indexes[turn][1], :].sum())} грн.')
-                last_y_s = cur_y_s
-            else:
-                row.append('')
-
-            row.append(f'КОД {str(indexes[turn][2])} - '
-                       f'{self.company_title(self.sources_dict.get(indexes[turn][2], "(!)"))}')
-                       # f'({self.f2s(piv.loc[int(cur_y), indexes[turn][1], indexes[turn][2]].sum())} грн.)'
-            row[1], row[3] = row[3], row[1]
-            row[1], row[2] = row[2], row[1]
+            if last_y_s != (cur_y, code):
+                row[1] = f'{dict_short.get(code, "Вид відсутній у довідниках")} (код {code})' \
+                         f' -   {"%.2f" % code_totals[(cur_y, code)]} грн.'
+                last_y_s = (cur_y, code)
+            row[2] = f'КОД {str(employer)} - {self.company_title(self.sources_dict.get(employer, "(!)"))}'
             cells.append(row)
         return cells
 
     @staticmethod
     def company_title(full_name):
-        """Застосування скорочень до найменування організаційно-правової форми юридичної особи"""
-        full_name = re.sub(' +', ' ', full_name)
-        for key, value in dict_company_types.items():
-            full_name = re.sub(key, value.upper(), full_name, flags=re.IGNORECASE)
-        return full_name
+        """Застосування скорочень до найменування організаційно-правової форми юридичної особи (з кешуванням)"""
+        return company_title(full_name)
 
     def _pivot_tab_add(self, data: List[List[str]]):
         """Додавання до документу форматованої зведеної таблиці РІК - ВИД - ЮРИДИЧНА ОСОБА - СУМА ЗА РІК """
@@ -694,83 +654,40 @@ class DocPartPerson:
         p_table_intro = self.document.add_paragraph(style='text_base')
         p_table_intro.add_run("Зведена таблиця доходів в розрізі періодів та видів: ")
 
-        # Створення таблиці та заповнення кольором заголовків:
-        tab = self.document.add_table(rows=len(data) + 1, cols=len(headers))
-        tab.allow_autofit = False
-        tab.style = 'Table Grid'
-        cells = self.get_cells_grid(tab)
-        for pos, header in enumerate(headers):
-            cells[0][pos].text = str(header)
-            cell_xml_element = cells[0][pos]._tc
-            table_cell_properties = cell_xml_element.get_or_add_tcPr()
-            shade_obj = OxmlElement('w:shd')
-            shade_obj.set(qn('w:fill'), 'd9d9d9')
-            table_cell_properties.append(shade_obj)
-
-        # Внесення даних у таблицю
-        for i in range(len(data)):
-            for j in range(len(headers)):
-                cells[i+1][j].text = data[i][j]
-
-        # Злиття клітинок:
-        for column in range(len(headers)):
-            last_filled = 0
-            for row in range(len(tab.rows)):
-                if cells[row][column].paragraphs[0].runs[0].text != "":
-                    if (row - last_filled) > 1:
-                        a = cells[last_filled][column]
-                        b = cells[row-1][column]
-                        a.merge(b)
-                    last_filled = row
-
-            if cells[len(data)][column].paragraphs[0].runs[0].text == "":
-                a = cells[last_filled][column]
-                b = cells[len(data)][column]
-                a.merge(b)
-
-        # Центрування колонок
-        for row in range(len(tab.rows)):
-            cells[row][0].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            cells[row][1].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-            cells[row][2].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-            cells[row][3].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-
-        # Центрування клітинок по вертикалі
-        for row in range(len(tab.rows)):
-            for vertical_col in [0, 1, 3]:
-                cells[row][vertical_col].vertical_alignment = WD_CELL_VERTICAL_ALIGNMENT.CENTER
-                cells[row][vertical_col].paragraphs[0].alignment = WD_CELL_VERTICAL_ALIGNMENT.CENTER
-
-        # Формат років (значень першої колонки)
-        for row in range(len(tab.rows)):
-            # cells[row][0].paragraphs[0].runs[0].font.bold = True
-            cells[row][0].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-
-        # Формат заголовків таблиці
-        for cell_pos in range(len(headers)):
-            cells[0][cell_pos].paragraphs[0].runs[0].font.bold = True
-            cells[0][cell_pos].paragraphs[0].alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            cells[0][cell_pos].paragraphs[0].alignment = WD_CELL_VERTICAL_ALIGNMENT.CENTER
-
-        # Встановлення ширини колонок
-        widths = (Cm(1), Cm(4.7), Cm(8.8), Cm(2.5))
-        for i in range(len(data) + 1):
-            for idx, width in enumerate(widths):
-                cells[i][idx].width = width
-
-        # Видалення порожніх рядків після злиття:
-        for column in range(len(headers)):
-            for row in range(len(tab.rows)):
-                cur_paragraphs = cells[row][column].paragraphs
-                if len(cur_paragraphs) > 1:
-                    for paragraph in cur_paragraphs[1:]:
-                        if len(paragraph.text) == 0:
-                            p = paragraph._element
-                            p.getparent().remove(p)
-                            p._p = p._element = None
+        # Таблиця формується одним проходом. Порожні клітинки (рік, вид доходу повторюються) зливаються
+        # вертикально з першою клітинкою групи, злиття визначається до створення таблиці:
+        add_table(self.document, headers, data,
+                  widths=(Cm(1), Cm(4.7), Cm(8.8), Cm(2.5)),
+                  alignments=(WD_PARAGRAPH_ALIGNMENT.CENTER, WD_PARAGRAPH_ALIGNMENT.CENTER, WD_PARAGRAPH_ALIGNMENT.LEFT,
+                              WD_PARAGRAPH_ALIGNMENT.CENTER),
+                  v_align_cols=(0, 1, 3),
+                  v_merge=merge_spans(data, range(len(headers))))
         self.document.add_paragraph(style='text_base')
 
 
+_worker_editor: Optional[DocEditor] = None  # інстанс DocEditor дочірнього процесу (формування частин документа)
+
+
+def _init_person_worker(descriptor: dict, options: dict):
+    """Ініціалізація дочірнього процесу: відкриття записів у спільній пам'яті та створення DocEditor"""
+    global _worker_editor
+    shared = SharedDrfoFrame.attach(descriptor)
+    try:
+        _worker_editor = DocEditor(shared.df, **options)
+    finally:
+        shared.close()
+
+
+def _render_person(person: str) -> bytes:
+    """Формування документа щодо особи у дочірньому процесі (результат - вміст файлу docx)"""
+    return _worker_editor.render_person_docx(person)
+
+
+def _write_persons_file(file: Path, persons: List[str]):
+    """Формування та збереження файлу щодо переліку осіб у дочірньому процесі"""
+    _worker_editor.write_persons_file(file, persons)
+
+
 
 
 
@@ -8,14 +8,22 @@
 """
 
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Union
+from typing import Callable, Optional, Union
 
 import pandas as pd
 import numpy as np
 import xml.etree.ElementTree as ET
 
 from defines import dict_long as sign_dict_default, response, service_col_names
+from shared_frame import SharedDrfoFrame
+from amount_format import format_amounts
+from code_labels import labels_long
+from bulk_export import write_csv, write_parquet
+from analytics import periods_sheet, pivot_sheets
+from periods import quarter_ordinal
+from excel_writer import ExcelStreamWriter, AMOUNT_NUMBER_FORMAT, EXCEL_MAX_ROWS, apply_number_formats
 
 
 class CellProfit:
@@ -51,6 +59,7 @@ class FileProfitXML:
     col_int = ['g5', 'g10', 'g11', 'g12']
     col_float = ['g8', 'g9']
     signs = sign_dict_default
+    labels = labels_long  # масив підстановки назв ознак доходу (відповідає signs)
 
     def __init__(self, file: Union[str, Path]):
         assert type(file) in [str, Path], "Тип посилання на файл - string або екземпляр Path"
@@ -219,6 +228,9 @@ class FileProfitXML:
 
         # Розрахунок колонки прибутку:
         self.df['profit'] = self.df['g8'] - self.df['g9']
+
+        # Порядковий номер кварталу (рік * 4 + квартал - 1) - розрахунок періодів без розбору рядків:
+        self.df['qord'] = quarter_ordinal(self.df['g12'], self.df['g11'])
         return warnings
 
     def _get_formatted_df(self, external_df=None, format_float=True, add_profit=True) -> pd.DataFrame:
@@ -232,51 +244,188 @@ class FileProfitXML:
         else:
             df_view = df[['g2s', 'g3s', 'g6s', 'g7s', 'g8', 'g9', 'g10', 'g11', 'g12']].copy()
 
-        def f2s(amount):
-            try:
-                thou_sep = ' '
-                deci_sep = '.'
-                w_dec = '%.2f' % amount
-                part_int = w_dec.split('.')[0]
-                part_int = re.sub(r"\B(?=(?:\d{3})+$)", thou_sep, part_int)
-                part_dec = w_dec.split('.')[1]
-                return part_int + deci_sep + part_dec
-            except Exception:
-                print(f'Error with float value {amount} (type {type(amount)}) - cant convert to string')
-                return '0.00'
-
         if format_float:
-            df_view['g8'] = df_view['g8'].apply(lambda x: f2s(x))
-            df_view['g9'] = df_view['g9'].apply(lambda x: f2s(x))
-            if 'profit' in df_view.columns:
-                df_view['profit'] = df_view['profit'].apply(lambda x: f2s(x))
-        df_view.replace({'g10': self.signs}, inplace=True)
+            for col in ['g8', 'g9', 'profit']:
+                if col in df_view.columns:
+                    df_view[col] = format_amounts(df_view[col].to_numpy(), error_value='0.00')
+        df_view['g10'] = self.labels.map(df_view['g10'].to_numpy())
         df_view.rename(columns=self.headers, inplace=True)
         df_view.fillna('Не зазначено', inplace=True)
         return df_view
 
-    def save_excel(self, file: Union[str, Path], separate=False, format_float=True, add_profit_column=True):
+    def save_excel(self, file: Union[str, Path], separate=False, format_float=True, add_profit_column=True,
+                   stream=False, chunk_size=50000, float_as_text=False, workers: Optional[int] = None,
+                   progress_callback: Optional[Callable[[int, int], None]] = None, by_sheets=False):
         """
         Збереження форматованого файлу таблиці Excel
 
         :param file: назва створюваного файлу
         :param separate: розділення на декілька файлів в разі записів щодо декількох осіб
+        :param by_sheets: один файл з окремим аркушем щодо кожної особи та аркушем змісту (підсумки по особах)
         :param format_float: форматування сум (12300,00 -> 12 300.00)
         :param add_profit_column: додати колонку розрахунку прибутку (дохід - податок)
+        :param stream: потоковий запис порціями (write-only) - пам'ять обмежена розміром порції
+                       (книга з аркушами осіб by_sheets записується потоково завжди)
+        :param chunk_size: кількість рядків у порції потокового запису
+        :param float_as_text: форматовані суми записуються текстом (попередній формат) замість чисел з форматом
+                              відображення клітинок
+        :param workers: кількість процесів для запису окремих файлів (None - за кількістю ядер, 1 - без паралельності)
+        :param progress_callback: функція відображення прогресу запису окремих файлів (записано, всього)
         """
         if type(file) == str:
             file = Path(file)
 
-        if not separate:
-            df = self._get_formatted_df(format_float=format_float, add_profit=add_profit_column)
-            df.to_excel(file, index=False)
+        options = dict(format_float=format_float, add_profit=add_profit_column, stream=stream,
+                       chunk_size=chunk_size, float_as_text=float_as_text)
+        if by_sheets:
+            self._write_excel_sheets(file, progress_callback=progress_callback, **options)
+        elif not separate:
+            self._write_excel(file, self.df, **options)
         else:
-            persons = self.df['g3s'].dropna().unique().tolist()
-            for p in persons:
-                df = self.df.loc[self.df['g3s'] == p]
-                cur_path = file.with_name(f"{file.stem}_{str(p)}{file.suffix}")
-                df_f = self._get_formatted_df(df, format_float=format_float, add_profit=add_profit_column)
-                df_f.to_excel(cur_path, index=False)
+            # Розділення записів по особах одним групуванням (порядок осіб - за першою появою у таблиці):
+            parts = [(file.with_name(f"{file.stem}_{str(p)}{file.suffix}"), df)
+                     for p, df in self.df.groupby('g3s', sort=False)]
+            total = len(parts)
+            if workers == 1 or total < 2:
+                for pos, (cur_path, df) in enumerate(parts):
+                    self._write_excel(cur_path, df, **options)
+                    if progress_callback is not None:
+                        progress_callback(pos + 1, total)
+                return
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_write_excel_part, cur_path, df, options) for cur_path, df in parts]
+                for done, future in enumerate(as_completed(futures)):
+                    future.result()  # передача винятків дочірнього процесу
+                    if progress_callback is not None:
+                        progress_callback(done + 1, total)
+
+    def _excel_formatting(self, format_float, add_profit, float_as_text):
+        """
+        Функція форматування порції записів та формати відображення колонок сум
+        (суми - текстом або числами з форматом клітинок)
+        """
+        text_float = format_float and float_as_text
+        number_formats = {}
+        if format_float and not float_as_text:
+            number_formats = {self.headers[col]: AMOUNT_NUMBER_FORMAT for col in ['g8', 'g9', 'profit']}
+
+        def formatter(chunk):
+            return self._get_formatted_df(chunk, format_float=text_float, add_profit=add_profit)
+
+        return formatter, number_formats
+
+    def _write_excel(self, file: Path, df: pd.DataFrame, format_float, add_profit, stream, chunk_size,
+                     float_as_text, max_rows=EXCEL_MAX_ROWS):
+        """Запис одного файлу Excel (повністю через to_excel або потоково порціями)"""
+        formatter, number_formats = self._excel_formatting(format_float, add_profit, float_as_text)
+        if df.shape[0] > max_rows - 1:
+            # Кількість записів перевищує ліміт аркуша - потоковий запис з аркушами продовження та підсумком:
+            self._write_excel_split(file, df, formatter, number_formats, add_profit, chunk_size, max_rows)
+            return
+        if not stream:
+            df_f = formatter(df)
+            with pd.ExcelWriter(file, engine='openpyxl') as excel_writer:
+                df_f.to_excel(excel_writer, index=False)
+                if number_formats:
+                    apply_number_formats(excel_writer.sheets['Sheet1'], number_formats)
+            return
+        writer = ExcelStreamWriter(file, chunk_size=chunk_size)
+        writer.write_sheet('Sheet1', df, formatter=formatter, number_formats=number_formats)
+        writer.save()
+
+    def _write_excel_split(self, file: Path, df: pd.DataFrame, formatter, number_formats, add_profit, chunk_size,
+                           max_rows):
+        """
+        Запис записів, кількість яких перевищує ліміт аркуша Excel: аркуш підсумку (записи та суми кожного аркуша
+        даних) та аркуші даних "Дані", "Дані_2"... Розподіл рядків по аркушах визначається до запису.
+        """
+        titles = ExcelStreamWriter.sheet_titles('Дані', df.shape[0], max_rows)
+        sheet_num = np.arange(df.shape[0]) // (max_rows - 1)
+        summary = df.groupby(sheet_num).agg(rows=('g8', 'size'), income=('g8', 'sum'), tax=('g9', 'sum'),
+                                            profit=('profit', 'sum'))
+        summary.loc[len(titles)] = summary.sum()
+        summary = summary.round(2)
+        summary.insert(0, 'sheet', titles + ['Всього'])
+        summary.insert(1, 'first_row', [pos * (max_rows - 1) + 1 for pos in range(len(titles))] + [1])
+        summary.columns = ['Аркуш', 'З запису №', 'Записів', self.headers['g8'], self.headers['g9'],
+                           self.headers['profit']]
+        if not add_profit:
+            summary.drop(columns=[self.headers['profit']], inplace=True)
+
+        writer = ExcelStreamWriter(file, chunk_size=chunk_size, max_rows=max_rows)
+        writer.write_sheet('Підсумок', summary,
+                           number_formats={self.headers[col]: AMOUNT_NUMBER_FORMAT for col in ['g8', 'g9', 'profit']})
+        writer.write_sheet('Дані', df, formatter=formatter, number_formats=number_formats)
+        writer.save()
+
+    def _write_excel_sheets(self, file: Path, format_float, add_profit, stream, chunk_size, float_as_text,
+                            progress_callback=None):
+        """
+        Запис однієї книги з аркушем щодо кожної особи та аркушем змісту з підсумками по особах. Книга записується
+        завжди потоково (аркуш за аркушем), незалежно від stream - обсяг книги з усіма особами не обмежується
+        пам'яттю.
+        """
+        formatter, number_formats = self._excel_formatting(format_float, add_profit, float_as_text)
+        groups = self.df.groupby('g3s', sort=False)
+
+        # Підсумки по особах (одним групуванням):
+        totals = groups.agg(rows=('g8', 'size'), income=('g8', 'sum'), tax=('g9', 'sum'), profit=('profit', 'sum'))
+        totals = totals.round(2)
+        totals.reset_index(inplace=True)
+        totals.columns = [self.headers['g3s'], 'Записів', self.headers['g8'], self.headers['g9'],
+                          self.headers['profit']]
+        if not add_profit:
+            totals.drop(columns=[self.headers['profit']], inplace=True)
+
+        writer = ExcelStreamWriter(file, chunk_size=chunk_size)
+        writer.write_sheet('Зміст', totals,
+                           number_formats={self.headers[col]: AMOUNT_NUMBER_FORMAT for col in ['g8', 'g9', 'profit']})
+        total = len(groups)
+        for pos, (p, df) in enumerate(groups):
+            title = re.sub(r'[\[\]:*?/\\]', '_', str(p))[:31]  # обмеження назв аркушів Excel
+            writer.write_sheet(title, df, formatter=formatter, number_formats=number_formats)
+            if progress_callback is not None:
+                progress_callback(pos + 1, total)
+        writer.save()
+
+    def save_excel_analytics(self, file: Union[str, Path], add_profit_column=True, chunk_size=50000):
+        """
+        Збереження аналітичної книги Excel (потоково): зведені аркуші сум за роками з проміжними підсумками
+        (особа x рік, ознака доходу x рік, агент x рік), аркуш періодів роботи (особа - агент) та аркуш записів "Дані"
+
+        :param file: назва створюваного файлу
+        :param add_profit_column: додати колонку розрахунку прибутку (дохід - податок)
+        :param chunk_size: кількість рядків у порції потокового запису
+        """
+        formatter, number_formats = self._excel_formatting(True, add_profit_column, False)
+        writer = ExcelStreamWriter(file, chunk_size=chunk_size)
+        for title, table in pivot_sheets(self.df, self.headers).items():
+            if not add_profit_column:
+                table = table.drop(columns=[self.headers['profit']])
+            writer.write_sheet(title, table, number_formats=number_formats)
+        writer.write_sheet('Періоди роботи', periods_sheet(self.df, self.headers))
+        writer.write_sheet('Дані', self.df, formatter=formatter, number_formats=number_formats)
+        writer.save()
+
+    def save_csv(self, file: Union[str, Path], partition_by: Optional[str] = None, chunk_size=200000):
+        """
+        Збереження очищених записів у CSV (типізовані колонки для подальшої аналітики)
+
+        :param file: назва створюваного файлу
+        :param partition_by: розділення на частини за особою ('person') або роком ('year')
+        :param chunk_size: кількість рядків у порції запису
+        """
+        write_csv(self.df, file, partition_by=partition_by, chunk_size=chunk_size)
+
+    def save_parquet(self, file: Union[str, Path], partition_by: Optional[str] = None, chunk_size=200000):
+        """
+        Збереження очищених записів у Parquet (типізовані колонки для подальшої аналітики, потребує pyarrow)
+
+        :param file: назва створюваного файлу
+        :param partition_by: розділення на частини за особою ('person') або роком ('year')
+        :param chunk_size: кількість рядків у порції (групі рядків) запису
+        """
+        write_parquet(self.df, file, partition_by=partition_by, chunk_size=chunk_size)
 
     @staticmethod
     def _tax_declaration_fix(df: pd.DataFrame):
@@ -331,13 +480,64 @@ class FileProfitXML:
         return row
 
 
+def _write_excel_part(file: Path, df: pd.DataFrame, options: dict):
+    """Запис файлу Excel щодо окремої особи (виконується у дочірньому процесі)"""
+    FileProfitXML(str(file))._write_excel(file, df, **options)
+
+
 class MultiFileDrfoData(FileProfitXML):
+    # Колонки, що визначають "ідентичність" запису при зведенні декількох витягів:
+    # особа, агент, рік, квартал, ознака доходу, дохід, податок
+    identity_cols = ['g3s', 'g6s', 'g12', 'g11', 'g10', 'g8', 'g9']
+
     def __init__(self):
         super().__init__(file='dummy path')  # dummy path
+        self.row_hashes = {}  # {хеш запису: назва файлу, з якого запис додано вперше}
+
+    def add_df(self, df_new: pd.DataFrame, source: str = '') -> str:
+        """
+        Додавання записів файлу до загального датафрейму з видаленням записів, що вже були завантажені з
+        інших файлів (витяги за періоди, що перетинаються). Ідентичність запису визначається хешем значень
+        колонок identity_cols, хеші попередньо доданих записів зберігаються у індексі row_hashes.
+
+        :param df_new: датафрейм опрацьованого файлу (після fill_df)
+        :param source: назва файлу (для звіту про видалені дублікати)
+        :return: текстовий опис видалених дублікатів
+        """
+        warnings = ''
+        hashes = self._hash_rows(df_new)
+        duplicated = hashes.isin(self.row_hashes.keys())
+        dup_count = int(duplicated.sum())
+        if dup_count:
+            warnings += f'Видалено {dup_count} записів, що вже завантажені з інших файлів:\n'
+            dup_info = pd.DataFrame({'person': df_new.loc[duplicated.values, 'g3s'].values,
+                                     'source': hashes[duplicated].map(self.row_hashes).values})
+            for person, sources in dup_info.groupby('person', sort=False)['source']:
+                files = ', '.join(sources.unique().tolist())
+                warnings += f'- РНОКПП {person}: {sources.shape[0]} записів (наявні у файлах: {files})\n'
+            df_new = df_new.loc[~duplicated.values]
+            hashes = hashes[~duplicated]
+
+        for h in hashes.unique().tolist():
+            self.row_hashes.setdefault(h, source)
 
-    def add_df(self, df_new: pd.DataFrame):
         self.df = pd.concat([self.df, df_new], ignore_index=True, sort=False)
         self.df.reset_index(inplace=True, drop=True)
+        return warnings
+
+    def to_shared(self) -> SharedDrfoFrame:
+        """
+        Розміщення накопичених записів у спільній пам'яті для паралельної обробки (дочірнім процесам
+        передається лише SharedDrfoFrame.descriptor). Після завершення обробки викликається release().
+        """
+        return SharedDrfoFrame.from_df(self.df)
+
+    def _hash_rows(self, df: pd.DataFrame) -> pd.Series:
+        """Хеш (uint64) ідентичності кожного запису датафрейму"""
+        cols = [c for c in self.identity_cols if c in df.columns]
+        hashes = pd.util.hash_pandas_object(df[cols], index=False)
+        hashes.reset_index(inplace=True, drop=True)
+        return hashes
 
     def read_xml(self) -> int:
         """